@@ -12,6 +12,7 @@
 
 依赖：
     pip install websocket-client
+    pip install orjson  # 可选，加速JSON解析
 
 使用方法：
     1. 确保比特浏览器客户端正在运行
@@ -23,170 +24,898 @@
 """
 
 import json
+import itertools
 import time
 import re
+import logging
+import http.client
+import traceback
 from datetime import datetime
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
-from urllib.parse import quote
+from pathlib import Path
+from urllib.parse import quote, urlsplit
 from email_utils import EmailUtils
 from bitbrowser_api import BitBrowserAPI, CDPClient, human_delay
 
+# 可选依赖：orjson 直接解析bytes，速度更快；未安装时使用标准库json
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+# 调试开关：打开后输出每个页面URL等详细信息
+DEBUG = False
+
+# 页面URL匹配规则（模块加载时编译一次）
+_MAIL_RE = re.compile(r"mail\.chatgpt\.org\.uk")
+_AUGMENT_RE = re.compile(r"(?:login\.)?augmentcode\.com")
+_ONBOARD_RE = re.compile(r"app\.augmentcode\.com/onboard")
+_PAYMENT_URL_RE = re.compile(r"payment|billing|stripe", re.IGNORECASE)
+# 点击Add Payment Method后的目标URL：支付相关页面，或离开onboard的app页面
+_PAYMENT_NAV_RE = re.compile(r"payment|billing|stripe|^(?!.*onboard).*app\.augmentcode\.com",
+                             re.IGNORECASE)
+
+# 读取session cookie时限定的站点
+_COOKIE_URLS = ["https://auth.augmentcode.com", "https://app.augmentcode.com"]
+
+# 临时邮箱API主机
+_MAIL_HOST = "mail.chatgpt.org.uk"
+
+# 服务端关闭空闲keep-alive连接时，下一次请求在收到响应前会遇到的错误
+_IDLE_CLOSE_ERRORS = (ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+
+# 验证码邮件的发件域名（忽略大小写，无需先lower()）
+_AUG_FROM_RE = re.compile(r"augmentcode\.com", re.IGNORECASE)
+
+# Cloudflare验证框选择器（按照cloudflare_bypass的选择器顺序）
+_CF_SELECTORS = [
+    'div[id*="ulp-"]',                           # Auth0 验证框（优先）
+    'div[class*="ulp-"]',
+    'div[id*="captcha"]',                        # 通用验证码
+    'div[class*="captcha"]',
+    'iframe[src*="challenges.cloudflare.com"]',  # Cloudflare iframe
+    'div[id*="cf-"]',                            # Cloudflare 元素
+    'div[class*="cf-"]',
+    'input[type="checkbox"][id*="cf"]',          # Cloudflare checkbox
+    'iframe[title*="cloudflare"]',
+    'iframe[src*="captcha"]',
+]
+_CF_SELECTOR_UNION = ", ".join(_CF_SELECTORS)
+
+# JavaScript备选点击：合并后的选择器只需一次原生匹配
+_CF_CLICK_JS = f"""
+    (() => {{
+        const element = document.querySelector({json.dumps(_CF_SELECTOR_UNION)});
+        if (element) {{
+            element.click();
+            return true;
+        }}
+        return false;
+    }})()
+"""
 
+# 按 _CF_SELECTORS 的优先级查找验证框，一次evaluate返回命中的选择器和元素中心坐标
+_CF_LOCATE_JS = f"""
+    (() => {{
+        for (const selector of {json.dumps(_CF_SELECTORS)}) {{
+            const element = document.querySelector(selector);
+            if (element) {{
+                const r = element.getBoundingClientRect();
+                return {{selector, x: r.left + r.width / 2, y: r.top + r.height / 2,
+                         width: r.width, height: r.height}};
+            }}
+        }}
+        return null;
+    }})()
+"""
 
+# 在元素中心依次派发 mousedown/mouseup/click，一次evaluate完成整个点击
+_SYNTH_CLICK_JS = """
+        const synthClick = (element) => {
+            element.scrollIntoView({block: 'center'});
+            const r = element.getBoundingClientRect();
+            const init = {bubbles: true, cancelable: true, view: window, button: 0,
+                          clientX: r.left + r.width / 2, clientY: r.top + r.height / 2};
+            for (const type of ['mousedown', 'mouseup', 'click']) {
+                element.dispatchEvent(new MouseEvent(type, init));
+            }
+        };
+"""
 
+# Sign in按钮：按文本内容（含value、aria-label）查找并点击
+_SIGNIN_TEXT_CLICK_JS = """
+    (() => {""" + _SYNTH_CLICK_JS + """
+        const buttons = document.querySelectorAll('button, a, input[type="submit"]');
+        for (const btn of buttons) {
+            const text = (btn.textContent || btn.value || btn.getAttribute('aria-label') || '').toLowerCase();
+            if (text.includes('sign in') || text.includes('signin')) {
+                synthClick(btn);
+                return true;
+            }
+        }
+        return false;
+    })()
+"""
 
-def get_email_from_browser(ws_url):
-    """从浏览器页面获取邮箱地址
+# Sign in按钮的备选选择器（按优先级排列）
+_SIGNIN_SELECTORS = [
+    'button[type="submit"]',
+    'input[type="submit"]',
+    'button',
+    'a[href*="login"]',
+    'a[href*="signin"]'
+]
+
+# 按优先级依次尝试选择器，返回命中的选择器
+_SIGNIN_SELECTOR_CLICK_JS = """
+    (() => {""" + _SYNTH_CLICK_JS + f"""
+        for (const selector of {json.dumps(_SIGNIN_SELECTORS)}) {{
+            const element = document.querySelector(selector);
+            if (element) {{
+                synthClick(element);
+                return selector;
+            }}
+        }}
+        return null;
+    }})()
+"""
+
+# 从邮箱页面提取邮箱地址的脚本
+_FIND_EMAIL_JS = """
+    new Promise((resolve) => {
+        const EMAIL_RE = /[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\\.[a-zA-Z]{2,}/;
+        const pick = (text) => {
+            if (text.includes('@') && (text.includes('chatgptuk.pp.ua') || text.includes('chatgpt.org.uk'))) {
+                const match = text.match(EMAIL_RE);
+                if (match) {
+                    return match[0];
+                }
+            }
+            return null;
+        };
+
+        const find = () => {
+            // 方法1: 逐行扫描页面文本（innerText由浏览器原生生成）
+            const lines = (document.body.innerText || '').split('\\n');
+            for (const line of lines) {
+                const email = pick(line);
+                if (email) {
+                    return email;
+                }
+            }
+
+            // 方法2: 检查输入框的值（innerText不包含input的value）
+            const inputs = document.getElementsByTagName('input');
+            for (let i = 0; i < inputs.length; i++) {
+                const email = pick(inputs[i].value || '');
+                if (email) {
+                    return email;
+                }
+            }
+
+            return null;
+        };
+
+        const email = find();
+        if (email) {
+            resolve(email);
+            return;
+        }
+
+        // 邮箱还未渲染：监听DOM变化，出现后立即返回
+        let timer = null;
+        const observer = new MutationObserver(() => {
+            const email = find();
+            if (email) {
+                observer.disconnect();
+                clearTimeout(timer);
+                resolve(email);
+            }
+        });
+        observer.observe(document.body, {subtree: true, childList: true, characterData: true});
+        timer = setTimeout(() => {
+            observer.disconnect();
+            resolve(null);
+        }, 8000);
+    })
+"""
+
+# 验证码提取规则，按优先级排列
+# 匹配格式: "Your verification code is: 529891"
+_CODE_PATTERNS = [
+    re.compile(r"verification code is:\s*(\d{6})", re.IGNORECASE),
+    re.compile(r"verification code is:\s*<b>(\d{6})</b>", re.IGNORECASE),
+    re.compile(r"code is:\s*(\d{6})", re.IGNORECASE),
+    re.compile(r"code:\s*(\d{6})", re.IGNORECASE),
+    re.compile(r"(\d{6})"),  # 最后尝试匹配任意6位数字
+]
+
+
+# 验证码输入框候选选择器（按优先级排列）
+_CODE_INPUT_SELECTORS = [
+    'input[type="text"]',
+    'input[type="number"]',
+    'input[name*="code"]',
+    'input[name*="verification"]',
+    'input[placeholder*="code"]',
+    'input[placeholder*="verification"]',
+    'input[id*="code"]',
+    'input[id*="verification"]',
+]
+
+# 逗号连接成选择器列表，供DOM兜底按文档顺序取第一个匹配
+_CODE_INPUT_SELECTOR = ", ".join(_CODE_INPUT_SELECTORS)
+
+# 查找 Continue 按钮的最长等待时间（毫秒）
+_CONTINUE_WAIT_MS = 3000
+
+# 按文本/aria-label匹配可用的 continue/next 按钮并点击；
+# 暂未出现或仍被禁用时在页面内监视DOM变化，出现即点击，超时返回false
+_CONTINUE_CLICK_JS = """
+new Promise((resolve) => {
+    const find = () => {
+        // 查找所有可能的按钮元素
+        const elements = document.querySelectorAll('button, a, input[type="submit"], input[type="button"]');
+
+        for (const el of elements) {
+            const text = (el.textContent || el.value || '').toLowerCase();
+            const ariaLabel = (el.getAttribute('aria-label') || '').toLowerCase();
+
+            // 匹配 "continue" 或 "next"，跳过禁用的按钮
+            if ((text.includes('continue') || text.includes('next') ||
+                 ariaLabel.includes('continue') || ariaLabel.includes('next')) && !el.disabled) {
+                return el;
+            }
+        }
+        return null;
+    };
+
+    let observer = null;
+    let timer = null;
+    const finish = (clicked) => {
+        if (observer) observer.disconnect();
+        clearTimeout(timer);
+        resolve(clicked);
+    };
+    const tryClick = () => {
+        const el = find();
+        if (el) {
+            el.click();
+            finish(true);
+        }
+        return el;
+    };
+
+    if (tryClick()) return;
+    observer = new MutationObserver(tryClick);
+    observer.observe(document.documentElement, { childList: true, subtree: true, attributes: true });
+    timer = setTimeout(() => finish(false), """ + str(_CONTINUE_WAIT_MS) + """);
+})
+"""
+
+# 附加页面时安装的辅助函数，供 AugmentSession.call_helper() 调用
+_AUG_HELPERS_JS = """
+window.__augHelpers = window.__augHelpers || {
+    findButtonByText(text) {
+        return Array.from(document.querySelectorAll('button'))
+            .find(b => b.textContent.includes(text)) || null;
+    },
+    clickButtonByText(text) {
+        const btn = this.findButtonByText(text);
+        if (!btn) {
+            return {found: false, clicked: false};
+        }
+        btn.click();
+        return {found: true, clicked: true, html: btn.outerHTML};
+    },
+    setInputValue(input, value) {
+        input.focus();
+        input.value = value;
+        input.dispatchEvent(new Event('input', { bubbles: true }));
+        input.dispatchEvent(new Event('change', { bubbles: true }));
+    },
+    // 按优先级依次尝试选择器，填写第一个找到的输入框，返回命中的选择器
+    fillFirst(selectors, value) {
+        for (const selector of selectors) {
+            const input = document.querySelector(selector);
+            if (input) {
+                this.setInputValue(input, value);
+                return selector;
+            }
+        }
+        return null;
+    },
+    // 兜底：填写第一个看起来像邮箱的输入框
+    fillEmailLike(value) {
+        for (const input of document.querySelectorAll('input')) {
+            // 只检查相关属性，不序列化整个元素的 outerHTML
+            const key = [input.name, input.id, input.placeholder, input.autocomplete,
+                         input.getAttribute('aria-label')].join(' ');
+            if (/email|work/i.test(key) || input.type === 'text' || input.type === 'email') {
+                this.setInputValue(input, value);
+                return true;
+            }
+        }
+        return false;
+    }
+};
+"""
+
+# 可点击元素的XPath及不区分大小写比较用的 translate() 模板
+_CLICKABLE_XPATH = "//*[self::button or self::a or self::input[@type='submit' or @type='button']]"
+_XPATH_LOWER = "translate({}, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+
+# 按XPath定位第一个元素，滚动到可见后返回其中心坐标；占位符 {query} 为 json.dumps() 后的XPath
+_LOCATE_XPATH_JS = """
+(() => {{
+    const el = document.evaluate({query}, document, null,
+                                 XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (!el) return null;
+    el.scrollIntoView({{block: 'center'}});
+    const r = el.getBoundingClientRect();
+    return {{x: r.left + r.width / 2, y: r.top + r.height / 2}};
+}})()
+"""
+
+# 页面条件成立时用于通知Python端的绑定名
+_SIGNAL_BINDING = "__augSignal"
+
+# 每次等待的唯一令牌，作为绑定回调的 payload，避免旧的监视器误触发后续等待
+_WAIT_TOKENS = itertools.count(1)
+
+# 监视页面条件，成立时以令牌调用绑定函数（只通知一次）
+# 占位符 {binding}、{token} 为 json.dumps() 后的绑定名和令牌，{condition} 为JS布尔表达式
+# 验证令牌写入 input.value 不会触发DOM变化，因此辅以页面内的低频检查
+# 监视器登记在 window.__augWaits 中，Python端超时后据此停止
+_WAIT_CONDITION_JS = """
+(() => {{
+    const check = () => {{
+        try {{ return Boolean({condition}); }} catch (e) {{ return false; }}
+    }};
+    const waits = window.__augWaits = window.__augWaits || {{}};
+    let fired = false;
+    let observer = null;
+    let timer = null;
+    const stop = () => {{
+        fired = true;
+        delete waits[{token}];
+        if (observer) observer.disconnect();
+        if (timer) clearInterval(timer);
+    }};
+    waits[{token}] = stop;
+    const fire = () => {{
+        if (fired || !check()) return;
+        stop();
+        window[{binding}]({token});
+    }};
+    fire();
+    if (fired) return;
+    observer = new MutationObserver(fire);
+    observer.observe(document.documentElement, {{ childList: true, subtree: true, attributes: true }});
+    timer = setInterval(fire, 200);
+    // Python端超时后不再需要通知，最多监视60秒
+    setTimeout(stop, 60000);
+}})()
+"""
+
+# Cloudflare验证完成：表单中已写入验证令牌
+_CF_DONE_CONDITION = (
+    "Array.from(document.querySelectorAll("
+    "'input[name=\"captcha\"], input[name=\"cf-turnstile-response\"]'))"
+    ".some(i => i.value)"
+)
+
+# 页面（含图片等子资源）加载完成
+_PAGE_LOADED_CONDITION = "document.readyState === 'complete'"
+
+# Cloudflare验证框已渲染（有尺寸），或验证已自动完成
+_CF_READY_CONDITION = (
+    f"(() => {{ const e = document.querySelector({json.dumps(_CF_SELECTOR_UNION)}); "
+    "return e !== null && e.getBoundingClientRect().width > 0; })() || "
+    f"{_CF_DONE_CONDITION}"
+)
+
+
+# 各站点上次命中的输入框选择器 {host: {"selector": ..., "time": ...}}，超过有效期视为失效
+_SELECTOR_HINTS_FILE = Path.home() / '.bitbrowser_script' / 'selectors.json'
+_SELECTOR_HINT_TTL = 7 * 24 * 3600
+# 兜底用的通用选择器命中时不记录，以免下次抢在专门的邮箱选择器之前
+_GENERIC_INPUT_SELECTOR = 'input[type="text"]'
+
+# 已编译脚本缓存 {(session_id, 脚本名): scriptId}
+_SCRIPT_IDS = {}
+
+
+def _internal_sleep(seconds):
+    """内部等待（页面加载、接口轮询等），不加随机抖动
+
+    页面看不到这类等待，抖动没有反检测作用；面向页面的点击、输入等操作仍使用 human_delay()
+    """
+    time.sleep(seconds)
+
+
+def _value(result):
+    """取出 Runtime.evaluate 等命令返回的值
 
     Args:
-        ws_url (str): WebSocket地址
+        result (dict): cdp.send 的返回结果（可能为None）
 
     Returns:
-        str: 邮箱地址，失败返回None
+        返回值，结果缺失时返回None
     """
-    print(f"\n🔍 正在从页面获取邮箱地址...")
+    try:
+        return result["result"]["result"].get("value")
+    except (TypeError, KeyError):
+        return None
 
-    cdp = CDPClient(ws_url)
 
+def _load_selector_hint(host):
+    """读取站点上次命中的选择器
+
+    Args:
+        host (str): 页面主机名
+
+    Returns:
+        str: 有效期内的选择器，没有记录、已过期或读取失败返回None
+    """
     try:
-        # 步骤1: 获取所有 targets
-        print("   📋 步骤1: 查找邮箱页面...")
-        result = cdp.send("Target.getTargets", {})
-        if not result or "result" not in result:
-            print("   ✗ 无法获取 targets")
-            return None
+        with open(_SELECTOR_HINTS_FILE, 'r', encoding='utf-8') as f:
+            hint = json.load(f).get(host)
+        if (hint and hint["selector"] != _GENERIC_INPUT_SELECTOR
+                and time.time() - hint["time"] < _SELECTOR_HINT_TTL):
+            return hint["selector"]
+    except (OSError, ValueError, TypeError, KeyError, AttributeError):
+        pass
+    return None
+
+
+def _save_selector_hint(host, selector):
+    """记录站点命中的选择器，下次优先尝试（通用选择器不记录，写入失败时忽略）
+
+    Args:
+        host (str): 页面主机名
+        selector (str): 命中的选择器
+    """
+    if selector == _GENERIC_INPUT_SELECTOR:
+        return
+
+    try:
+        with open(_SELECTOR_HINTS_FILE, 'r', encoding='utf-8') as f:
+            hints = json.load(f)
+        if not isinstance(hints, dict):
+            hints = {}
+    except (OSError, ValueError):
+        hints = {}
+
+    hints[host] = {"selector": selector, "time": int(time.time())}
+    try:
+        _SELECTOR_HINTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(_SELECTOR_HINTS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(hints, f, ensure_ascii=False, indent=2)
+    except OSError:
+        pass
+
+
+def _run_script(cdp, session_id, name, source, await_promise=False):
+    """运行脚本，同一会话内只编译一次
+
+    首次调用用 Runtime.compileScript(persistScript) 编译并缓存 scriptId，
+    之后直接 Runtime.runScript。页面跳转后脚本失效（runScript 返回协议错误，
+    脚本未执行）时重新编译一次；编译失败则退回 Runtime.evaluate。
+    没有响应（超时或断开）时脚本可能已经执行，直接返回None，不再重复执行，
+    以免点击类脚本被执行两次。
+
+    Args:
+        cdp: CDPClient实例
+        session_id: CDP会话ID
+        name (str): 脚本名，作为缓存键和 sourceURL
+        source (str): 脚本源码
+        await_promise (bool): 是否等待返回的Promise
+
+    Returns:
+        dict: cdp.send 的返回结果（可能为None）
+    """
+    key = (session_id, name)
+    for _ in range(2):
+        script_id = _SCRIPT_IDS.get(key)
+        if script_id is None:
+            result = cdp.send("Runtime.compileScript", {
+                "expression": source,
+                "sourceURL": f"{name}.js",
+                "persistScript": True
+            }, session_id=session_id)
+            if result is None:
+                return None
+            try:
+                script_id = result["result"]["scriptId"]
+            except (TypeError, KeyError):
+                break
+            _SCRIPT_IDS[key] = script_id
+
+        result = cdp.send("Runtime.runScript", {
+            "scriptId": script_id,
+            "awaitPromise": await_promise,
+            "returnByValue": True
+        }, session_id=session_id)
+        if result is None or "error" not in result:
+            return result
+        # 脚本已失效（执行上下文已销毁），丢弃旧的 scriptId 后重新编译
+        _SCRIPT_IDS.pop(key, None)
+
+    return cdp.send("Runtime.evaluate", {
+        "expression": source,
+        "awaitPromise": await_promise,
+        "returnByValue": True
+    }, session_id=session_id)
+
+
+def locate_button_by_text(cdp, session_id, *texts):
+    """按文本定位可点击元素，返回其视口中心坐标
+
+    匹配 button、a、submit/button 类型 input 的文本、value 或 aria-label，
+    不区分大小写，任一文本命中即可。XPath 查找和坐标计算都在页面内完成，一次往返。
+
+    Args:
+        cdp: CDPClient实例
+        session_id: CDP会话ID
+        *texts (str): 要匹配的文本（不含引号）
+
+    Returns:
+        tuple: 文档顺序中第一个匹配元素的中心坐标 (x, y)，未找到返回None
+    """
+    conditions = " or ".join(
+        f"contains({_XPATH_LOWER.format(value)}, '{text.lower()}')"
+        for text in texts for value in (".", "@value", "@aria-label"))
+    query = f"{_CLICKABLE_XPATH}[{conditions}]"
+
+    result = cdp.send("Runtime.evaluate", {
+        "expression": _LOCATE_XPATH_JS.format(query=json.dumps(query)),
+        "returnByValue": True
+    }, session_id=session_id)
+
+    point = _value(result)
+    if not point:
+        return None
+    print(f"   📍 按钮位置: ({point['x']:.1f}, {point['y']:.1f})")
+    return point["x"], point["y"]
+
+
+def dispatch_click(cdp, session_id, x, y, move=True):
+    """在坐标处发送一次人类化的鼠标点击
+
+    移动、按下、释放三个事件共用同一个参数字典，只改 type 字段；
+    前两个事件不等待响应，按键之间保留人类化延迟。
+
+    Args:
+        cdp: CDPClient实例
+        session_id: CDP会话ID
+        x (float): 视口横坐标
+        y (float): 视口纵坐标
+        move (bool): 是否先移动鼠标并停顿；普通按钮不检测悬停，可传False省去
+
+    Returns:
+        bool: 最后一个事件成功返回True，失败返回False
+    """
+    params = {"type": "mouseMoved", "x": x, "y": y, "button": "none", "clickCount": 0}
+    if move:
+        cdp.send_nowait("Input.dispatchMouseEvent", params, session_id=session_id)
+        human_delay(0.1, jitter_percent=0.5)
+
+    params = {**params, "button": "left", "clickCount": 1, "type": "mousePressed"}
+    cdp.send_nowait("Input.dispatchMouseEvent", params, session_id=session_id)
+    human_delay(0.05, jitter_percent=0.5)
+
+    params["type"] = "mouseReleased"
+    result = cdp.send("Input.dispatchMouseEvent", params, session_id=session_id)
+    return bool(result and "error" not in result)
 
-        targets = result["result"]["targetInfos"]
 
-        # 根据URL查找邮箱页面
-        page_target = None
-        for target in targets:
+def wait_for_page_condition(cdp, session_id, condition, timeout=10.0):
+    """等待页面内的条件成立
+
+    通过 Runtime.addBinding 注册回调，页面内用 MutationObserver（辅以低频检查）
+    监视条件，条件成立时页面主动通知，Python端只需阻塞等待事件。
+
+    Args:
+        cdp: CDPClient实例
+        session_id: CDP会话ID
+        condition (str): JS布尔表达式
+        timeout (float): 最长等待时间（秒）
+
+    Returns:
+        bool: 条件成立返回True，超时返回False
+    """
+    token = f"wait-{next(_WAIT_TOKENS)}"
+    events = cdp.subscribe("Runtime.bindingCalled")
+    msg = None
+    try:
+        cdp.send("Runtime.addBinding", {"name": _SIGNAL_BINDING}, session_id=session_id)
+        cdp.send("Runtime.evaluate", {
+            "expression": _WAIT_CONDITION_JS.format(binding=json.dumps(_SIGNAL_BINDING),
+                                                    token=json.dumps(token), condition=condition)
+        }, session_id=session_id)
+        # 只认本次等待的令牌，之前超时的监视器发出的通知不算
+        msg = cdp.wait_event(events, lambda m: (m.get("sessionId") == session_id
+                                                and m["params"].get("name") == _SIGNAL_BINDING
+                                                and m["params"].get("payload") == token),
+                             timeout=timeout)
+        return msg is not None
+    finally:
+        cdp.unsubscribe(events)
+        if msg is None:
+            # 超时：停止页面内仍在运行的监视器
+            cdp.send_nowait("Runtime.evaluate", {
+                "expression": f"(window.__augWaits || {{}})[{json.dumps(token)}]?.()"
+            }, session_id=session_id)
+        cdp.send_nowait("Runtime.removeBinding", {"name": _SIGNAL_BINDING}, session_id=session_id)
+
+
+def find_target_by_url(cdp, pattern):
+    """在目标表中查找URL匹配的第一个page
+
+    Args:
+        cdp: CDPClient实例
+        pattern (re.Pattern): 预编译的URL匹配规则
+
+    Returns:
+        dict: 匹配的target，未找到返回None
+    """
+    if DEBUG:
+        for target in list(cdp.targets.values()):
             if target.get("type") == "page":
-                url = target.get("url", "")
-                print(f"   📄 发现页面: {url}")
-                if "mail.chatgpt.org.uk" in url:
-                    page_target = target
-                    print(f"   ✓ 找到邮箱页面!")
-                    break
+                print(f"   📄 发现页面: {target.get('url', '')}")
 
-        # 如果没找到邮箱页面，使用第一个page
-        if not page_target:
-            print("   ⚠️  未找到邮箱页面URL，尝试使用第一个page...")
-            for target in targets:
-                if target.get("type") == "page":
-                    page_target = target
-                    break
-
-        if not page_target:
-            print("   ✗ 未找到任何 page target")
-            return None
+    return cdp.find_target(lambda t: t.get("type") == "page" and pattern.search(t.get("url", "")))
 
-        target_id = page_target["targetId"]
-        print(f"   ✓ 目标页面ID: {target_id}")
 
-        # 步骤2: 激活目标页面
-        print("   🎯 步骤2: 激活邮箱页面...")
-        cdp.send("Target.activateTarget", {"targetId": target_id})
-        human_delay(1.0)  # 等待激活完成（人类化延迟）
-        print("   ✓ 页面已激活")
+class AugmentSession:
+    """注册后续步骤共用的CDP会话
 
-        # 步骤3: 附加到 target
-        print("   🔗 步骤3: 连接到页面...")
-        result = cdp.send("Target.attachToTarget", {
-            "targetId": target_id,
-            "flatten": True
-        })
+    整个流程只建立一次WebSocket连接，已附加的页面会话按 targetId 缓存，
+    获取邮箱、登录、验证码填写、onboard跳转、支付链接、cookie获取等步骤直接复用，
+    不再各自重新连接、附加页面和启用域。
 
+    示例:
+        >>> with AugmentSession(ws_url) as session:
+        >>>     fill_verification_code(session, email)
+        >>>     get_payment_method_link(session)
+    """
+
+    def __init__(self, ws_url):
+        """建立CDP连接
+
+        Args:
+            ws_url (str): WebSocket地址
+        """
+        self.ws_url = ws_url
+        self.cdp = CDPClient.get_client(ws_url)
+        # 已附加的页面 {targetId: sessionId}
+        self._sessions = {}
+        self._auth_target_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def find_target(self, pattern):
+        """查找URL匹配的页面
+
+        Args:
+            pattern (re.Pattern): 预编译的URL匹配规则
+
+        Returns:
+            dict: 匹配的target，未找到返回None
+        """
+        return find_target_by_url(self.cdp, pattern)
+
+    def attach(self, target_id, domains=("Page", "DOM", "Runtime")):
+        """激活并附加到页面，同一页面只附加一次
+
+        Args:
+            target_id (str): 页面targetId
+            domains (tuple): 首次附加时需要启用的域
+
+        Returns:
+            str: sessionId，失败返回None
+        """
+        activated_at = time.monotonic()
+        session_id = self._sessions.get(target_id)
+        if session_id:
+            self.cdp.send("Target.activateTarget", {"targetId": target_id})
+            _internal_sleep(1.0)  # 等待激活完成
+            return session_id
+
+        # 激活与附加互不依赖，同一批发出；启用各域在等待激活期间完成
+        _, result = self.cdp.send_many([
+            ("Target.activateTarget", {"targetId": target_id}),
+            ("Target.attachToTarget", {"targetId": target_id, "flatten": True}),
+        ])
         if not result or "result" not in result:
-            print("   ✗ 无法附加到 target")
             return None
 
         session_id = result["result"]["sessionId"]
-        print("   ✓ 连接成功")
-
-        # 步骤4: 启用必要的域并等待页面加载
-        print("   ⏳ 步骤4: 等待页面加载...")
-        cdp.send("Page.enable", {}, session_id=session_id)
-        cdp.send("DOM.enable", {}, session_id=session_id)
-        cdp.send("Runtime.enable", {}, session_id=session_id)
-
-        # 等待页面加载完成（人类化延迟）
-        human_delay(3.0)
-        print("   ✓ 页面加载完成")
-
-        # 步骤5: 多次尝试获取邮箱地址
-        print("   🔍 步骤5: 查找邮箱地址...")
-        max_retries = 3
-        for attempt in range(max_retries):
-            if attempt > 0:
-                print(f"   🔄 第 {attempt + 1} 次尝试...")
-                human_delay(2.0)  # 重试间隔（人类化延迟）
-
-            # 方法1: 使用JavaScript查找
-            result = cdp.send("Runtime.evaluate", {
-                "expression": """
-                    (() => {
-                        // 方法1: 查找所有包含@的文本节点
-                        const walker = document.createTreeWalker(
-                            document.body,
-                            NodeFilter.SHOW_TEXT,
-                            null,
-                            false
-                        );
-
-                        let node;
-                        while(node = walker.nextNode()) {
-                            const text = node.textContent.trim();
-                            if (text.includes('@') && (text.includes('chatgptuk.pp.ua') || text.includes('chatgpt.org.uk'))) {
-                                // 使用正则提取邮箱
-                                const match = text.match(/[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\\.[a-zA-Z]{2,}/);
-                                if (match) {
-                                    return match[0];
-                                }
-                            }
-                        }
-
-                        // 方法2: 查找特定的元素
-                        const selectors = [
-                            'input[type="text"]',
-                            'input[readonly]',
-                            'div[class*="email"]',
-                            'span[class*="email"]',
-                            'p',
-                            'div'
-                        ];
-
-                        for (const selector of selectors) {
-                            const elements = document.querySelectorAll(selector);
-                            for (const el of elements) {
-                                const text = el.textContent || el.value || '';
-                                if (text.includes('@') && (text.includes('chatgptuk.pp.ua') || text.includes('chatgpt.org.uk'))) {
-                                    const match = text.match(/[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\\.[a-zA-Z]{2,}/);
-                                    if (match) {
-                                        return match[0];
-                                    }
-                                }
-                            }
-                        }
-
-                        return null;
-                    })()
-                """,
+        commands = [(f"{domain}.enable", {}, session_id) for domain in domains]
+        if "Runtime" in domains:
+            # 页面辅助函数：当前文档立即安装，之后每次导航由浏览器自动注入
+            commands += [
+                ("Page.addScriptToEvaluateOnNewDocument", {"source": _AUG_HELPERS_JS}, session_id),
+                ("Runtime.evaluate", {"expression": _AUG_HELPERS_JS}, session_id),
+            ]
+        self.cdp.send_many(commands)
+        self._sessions[target_id] = session_id
+
+        # 等待激活完成（已用于附加和启用的时间不再重复等待）
+        _internal_sleep(max(0.0, 1.0 - (time.monotonic() - activated_at)))
+        return session_id
+
+    def query_selector(self, session_id, selector):
+        """在页面中查找元素（DOM.querySelector，由浏览器原生执行）
+
+        Args:
+            session_id (str): attach() 返回的sessionId
+            selector (str): CSS选择器（可以是逗号分隔的选择器列表）
+
+        Returns:
+            int: 节点ID，未找到返回None
+        """
+        for _ in range(2):
+            root_node_id = self.cdp.get_document_root(session_id)
+            if not root_node_id:
+                return None
+            result = self.cdp.send("DOM.querySelector", {
+                "nodeId": root_node_id,
+                "selector": selector
+            }, session_id=session_id)
+            if result and "result" in result:
+                # nodeId 为0表示没有匹配元素
+                return result["result"].get("nodeId") or None
+            # 根节点已失效，重新获取后再试一次
+            self.cdp.reset_document_root(session_id)
+        return None
+
+    def type_into(self, session_id, node_id, text):
+        """聚焦节点并输入文本
+
+        Input.insertText 由浏览器产生真实的输入事件，无需在JS中手动派发。
+
+        Args:
+            session_id (str): attach() 返回的sessionId
+            node_id (int): 输入框节点ID
+            text (str): 要输入的文本
+
+        Returns:
+            bool: 成功返回True，失败返回False
+        """
+        result = self.cdp.send("DOM.focus", {"nodeId": node_id}, session_id=session_id)
+        if not result or "error" in result:
+            return False
+        result = self.cdp.send("Input.insertText", {"text": text}, session_id=session_id)
+        return bool(result and "error" not in result)
+
+    def call_helper(self, session_id, name, *args):
+        """调用页面中 window.__augHelpers 上的辅助函数
+
+        辅助函数只在附加页面时解析一次，这里每次只发送一行调用表达式。
+        页面上缺少辅助函数时重新安装一次再调用。
+
+        Args:
+            session_id (str): attach() 返回的sessionId
+            name (str): 函数名，如 "clickButtonByText"
+            *args: 函数参数（需可JSON序列化）
+
+        Returns:
+            函数返回值，失败返回None
+        """
+        expression = f"window.__augHelpers.{name}({', '.join(json.dumps(arg) for arg in args)})"
+        for _ in range(2):
+            result = self.cdp.send("Runtime.evaluate", {
+                "expression": expression,
                 "returnByValue": True
             }, session_id=session_id)
+            if result and "exceptionDetails" not in result.get("result", {}):
+                return _value(result)
+            self.cdp.send("Runtime.evaluate", {"expression": _AUG_HELPERS_JS}, session_id=session_id)
+        return None
+
+    def attach_onboard(self):
+        """附加到onboard页面
+
+        Returns:
+            str: sessionId，未找到页面或附加失败返回None
+        """
+        target = self.find_target(_ONBOARD_RE)
+        if not target:
+            return None
+        print(f"   ✓ 找到onboard页面: {target.get('url', '')}")
+        return self.attach(target["targetId"], ("DOM", "Runtime", "Page", "Network"))
+
+    def attach_auth(self):
+        """打开（仅首次）并附加到auth.augmentcode.com页面
+
+        Returns:
+            str: sessionId，失败返回None
+        """
+        if not self._auth_target_id:
+            result = self.cdp.send("Target.createTarget", {
+                "url": "https://auth.augmentcode.com"
+            })
+            if not result or "result" not in result:
+                return None
+            self._auth_target_id = result["result"]["targetId"]
+            print(f"   ✓ 新标签页已创建")
+
+            # 等待页面加载
+            print("   ⏳ 等待页面加载...")
+            _internal_sleep(3.0)
+
+        return self.attach(self._auth_target_id, ("Network",))
+
+    def close(self):
+        """关闭CDP连接"""
+        self.cdp.close()
+
+
+def get_email_from_browser(session):
+    """从浏览器页面获取邮箱地址
+
+    Args:
+        session (AugmentSession): 共用的CDP会话
+
+    Returns:
+        str: 邮箱地址，失败返回None
+    """
+    print(f"\n🔍 正在从页面获取邮箱地址...")
 
-            if result and "result" in result and "result" in result["result"]:
-                email = result["result"]["result"].get("value")
-                if email:
-                    print(f"   ✓ 找到邮箱地址: {email}")
-                    return email
+    cdp = session.cdp
 
-        print("   ✗ 未找到邮箱地址")
+    # 步骤1: 获取所有 targets
+    print("   📋 步骤1: 查找邮箱页面...")
+    # 根据URL查找邮箱页面
+    page_target = session.find_target(_MAIL_RE)
+    if page_target:
+        print(f"   ✓ 找到邮箱页面!")
+    else:
+        # 如果没找到邮箱页面，使用第一个page
+        print("   ⚠️  未找到邮箱页面URL，尝试使用第一个page...")
+        page_target = cdp.find_target(lambda t: t.get("type") == "page")
+
+    if not page_target:
+        print("   ✗ 未找到任何 page target")
         return None
 
-    finally:
-        cdp.close()
+    target_id = page_target["targetId"]
+    print(f"   ✓ 目标页面ID: {target_id}")
+
+    # 步骤2-3: 激活并附加到邮箱页面（会话按页面缓存，后续步骤直接复用）
+    print("   🔗 步骤2-3: 激活并连接到邮箱页面...")
+    session_id = session.attach(target_id)
+    if not session_id:
+        print("   ✗ 无法附加到 target")
+        return None
+    print("   ✓ 连接成功")
+
+    # 步骤4: 等待页面加载（加载完成即继续，最多3秒）
+    print("   ⏳ 步骤4: 等待页面加载...")
+    wait_for_page_condition(cdp, session_id, _PAGE_LOADED_CONDITION, timeout=3.0)
+    print("   ✓ 页面加载完成")
+
+    # 步骤5: 查找邮箱地址
+    # 脚本返回Promise：页面上已有邮箱则立即返回，否则由MutationObserver
+    # 在邮箱渲染出来的那一刻返回（最多等待8秒），无需Python端轮询
+    print("   🔍 步骤5: 查找邮箱地址...")
+
+    result = _run_script(cdp, session_id, "find_email", _FIND_EMAIL_JS, await_promise=True)
+
+    email = _value(result)
+    if email:
+        print(f"   ✓ 找到邮箱地址: {email}")
+        return email
+
+    print("   ✗ 未找到邮箱地址")
+    return None
 
 
 def click_cloudflare_verify(cdp, session_id):
@@ -201,132 +930,72 @@ def click_cloudflare_verify(cdp, session_id):
     """
     print("   🛡️  查找Cloudflare验证框...")
 
-    # 1. 查找验证框元素（按照cloudflare_bypass的选择器顺序）
-    selectors = [
-        'div[id*="ulp-"]',                           # Auth0 验证框（优先）
-        'div[class*="ulp-"]',
-        'div[id*="captcha"]',                        # 通用验证码
-        'div[class*="captcha"]',
-        'iframe[src*="challenges.cloudflare.com"]',  # Cloudflare iframe
-        'div[id*="cf-"]',                            # Cloudflare 元素
-        'div[class*="cf-"]',
-        'input[type="checkbox"][id*="cf"]',          # Cloudflare checkbox
-        'iframe[title*="cloudflare"]',
-        'iframe[src*="captcha"]',
-    ]
-
-    # 获取文档根节点
-    result = cdp.send("DOM.getDocument", {"depth": -1}, session_id=session_id)
-    if not result or "result" not in result:
-        print("   ✗ 无法获取 DOM 文档")
-        return False
-
-    root_node_id = result["result"]["root"]["nodeId"]
-    print(f"   ✓ 获取根节点: {root_node_id}")
-
-    # 尝试查找验证框
-    node_id = None
-    matched_selector = None
-    for selector in selectors:
-        print(f"   🔍 尝试选择器: {selector}")
-        result = cdp.send("DOM.querySelectorAll", {
-            "nodeId": root_node_id,
-            "selector": selector
-        }, session_id=session_id)
-
-        if result and "result" in result and result["result"].get("nodeIds"):
-            node_ids = result["result"]["nodeIds"]
-            if node_ids:
-                node_id = node_ids[0]
-                matched_selector = selector
-                print(f"   ✓ 找到 {len(node_ids)} 个元素，使用第一个")
-                break
-
-    if not node_id:
+    # 1. 查找验证框元素并获取位置（按照_CF_SELECTORS的优先级顺序，页面内一次完成）
+    box = _value(_run_script(cdp, session_id, "cf_locate", _CF_LOCATE_JS))
+    if not box:
         print("   ⚠️  未找到验证框元素")
         print("   💡 提示: 验证框可能还未加载，或已经完成验证")
         return False
 
-    print(f"   ✓ 找到验证框: {matched_selector}, NodeID={node_id}")
+    print(f"   ✓ 找到验证框: {box['selector']}")
 
-    # 2. 获取元素位置
-    print("   📏 获取元素位置...")
-    result = cdp.send("DOM.getBoxModel", {"nodeId": node_id}, session_id=session_id)
-    if not result or "result" not in result:
+    # 2. 元素未渲染（尺寸为0）时无法用鼠标点击
+    if not box["width"] or not box["height"]:
         print("   ✗ 无法获取元素位置，尝试使用JavaScript点击...")
 
         # 备选方案：使用JavaScript点击
-        result = cdp.send("Runtime.evaluate", {
-            "expression": f"""
-                (() => {{
-                    const selectors = {selectors};
-                    for (const selector of selectors) {{
-                        const element = document.querySelector(selector);
-                        if (element) {{
-                            element.click();
-                            return true;
-                        }}
-                    }}
-                    return false;
-                }})()
-            """,
-            "returnByValue": True
-        }, session_id=session_id)
+        result = _run_script(cdp, session_id, "cf_click", _CF_CLICK_JS)
 
-        if result and "result" in result and "result" in result["result"]:
-            success = result["result"]["result"].get("value")
-            if success:
-                print("   ✓ JavaScript点击成功")
-                return True
+        success = _value(result)
+        if success:
+            print("   ✓ JavaScript点击成功")
+            return True
 
         print("   ✗ JavaScript点击也失败")
         return False
 
-    box_model = result["result"]["model"]
-    content = box_model["content"]
-    x = (content[0] + content[4]) / 2
-    y = (content[1] + content[5]) / 2
-    width = content[4] - content[0]
-    height = content[5] - content[1]
-
-    print(f"   ✓ 元素位置: x={x:.1f}, y={y:.1f}, 大小={width:.0f}x{height:.0f}")
+    x = box["x"]
+    y = box["y"]
+    print(f"   ✓ 元素位置: x={x:.1f}, y={y:.1f}, 大小={box['width']:.0f}x{box['height']:.0f}")
 
     # 3. 发送CDP鼠标点击事件（模拟人类操作）
     print("   🖱️  发送CDP鼠标点击事件...")
 
-    # 鼠标移动
-    cdp.send("Input.dispatchMouseEvent", {
-        "type": "mouseMoved",
-        "x": x,
-        "y": y
-    }, session_id=session_id)
+    dispatch_click(cdp, session_id, x, y)
 
-    # 短暂延迟（模拟人类移动鼠标后的停顿）
-    human_delay(0.1, jitter_percent=0.5)
+    print("   ✓ CDP点击完成")
+    return True
 
-    # 鼠标按下
-    cdp.send("Input.dispatchMouseEvent", {
-        "type": "mousePressed",
-        "x": x,
-        "y": y,
-        "button": "left",
-        "clickCount": 1
-    }, session_id=session_id)
 
-    # 短暂延迟（模拟人类按下和释放之间的时间）
-    human_delay(0.05, jitter_percent=0.5)
+def _mail_connection():
+    """创建临时邮箱API的HTTPS连接（首次请求时才建立TCP/TLS连接）"""
+    return http.client.HTTPSConnection(_MAIL_HOST, timeout=10)
 
-    # 鼠标释放
-    cdp.send("Input.dispatchMouseEvent", {
-        "type": "mouseReleased",
-        "x": x,
-        "y": y,
-        "button": "left",
-        "clickCount": 1
-    }, session_id=session_id)
 
-    print("   ✓ CDP点击完成")
-    return True
+def _mail_get(conn, path, headers):
+    """在keep-alive连接上发送GET请求
+
+    轮询间隔较长，服务端可能已关闭空闲连接；收到任何响应之前连接被断开时
+    （RemoteDisconnected 等），GET 是幂等的，立即重连重试一次。
+
+    Args:
+        conn (http.client.HTTPConnection): 复用的连接
+        path (str): 请求路径
+        headers (dict): 请求头
+
+    Returns:
+        tuple: (response, body)
+    """
+    for attempt in range(2):
+        response = None
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            return response, response.read()
+        except _IDLE_CLOSE_ERRORS:
+            conn.close()
+            if attempt or response is not None:
+                raise
 
 
 def get_verification_code_from_email(email):
@@ -343,27 +1012,70 @@ def get_verification_code_from_email(email):
 
     # URL编码邮箱地址
     encoded_email = quote(email)
-    api_url = f"https://mail.chatgpt.org.uk/api/get-emails?email={encoded_email}"
+    api_path = f"/api/get-emails?email={encoded_email}"
+    api_url = f"https://{_MAIL_HOST}{api_path}"
 
     print(f"   🔗 API地址: {api_url}")
 
-    # 最多尝试10次，每次间隔3秒
+    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+
+    # 本次调用的所有轮询复用同一个HTTPS连接（keep-alive），只需一次TLS握手；
+    # 出错时关闭，下次请求自动重连
+    conn = _mail_connection()
+    try:
+        return _poll_verification_code(conn, api_path, headers)
+    finally:
+        conn.close()
+
+
+def _poll_verification_code(conn, api_path, headers):
+    """轮询邮箱API直到找到验证码，见 get_verification_code_from_email()
+
+    Args:
+        conn (http.client.HTTPConnection): 本次调用使用的连接
+        api_path (str): 邮箱API路径
+        headers (dict): 请求头
+
+    Returns:
+        str: 验证码，失败返回None
+    """
+
+    # 收件箱未变化时服务端可直接返回304，不重复下载
+    etag = None
+
+    # 最多尝试10次，间隔从1秒起指数增长，最长8秒
     max_retries = 10
+    delay = 1.0
+    started = None
     for attempt in range(max_retries):
+        if attempt:
+            # 间隔从上次请求发出时算起，请求本身的耗时计入等待，不额外推迟下一次轮询
+            remaining = delay - (time.monotonic() - started)
+            if remaining > 0:
+                _internal_sleep(remaining)
+            delay = min(delay * 1.7, 8.0)
+        started = time.monotonic()
         try:
             print(f"   🔄 第 {attempt + 1}/{max_retries} 次尝试...")
 
-            # 发送HTTP请求
-            req = Request(api_url)
-            req.add_header('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+            # 发送HTTP请求（带上次的ETag做条件请求）
+            request_headers = {**headers, "If-None-Match": etag} if etag else headers
+            response, body = _mail_get(conn, api_path, request_headers)
 
-            response = urlopen(req, timeout=10)
-            data = json.loads(response.read().decode('utf-8'))
+            if response.status == 304:
+                print(f"   ⏳ 收件箱无变化，稍后重试...")
+                continue
+
+            if response.status != 200:
+                print(f"   ✗ HTTP错误: {response.status} {response.reason}")
+                continue
+
+            etag = response.getheader("ETag")
+            data = _loads(body)
 
             # 检查是否有邮件
             if not data.get('emails'):
-                print(f"   ⏳ 暂无邮件，等待3秒后重试...")
-                human_delay(3.0)
+                print(f"   ⏳ 暂无邮件，稍后重试...")
                 continue
 
             emails = data['emails']
@@ -377,21 +1089,12 @@ def get_verification_code_from_email(email):
 
                 print(f"   📧 邮件: {from_addr} - {subject}")
 
-                if 'augmentcode.com' in from_addr.lower():
+                if _AUG_FROM_RE.search(from_addr):
                     print(f"   ✓ 找到Augment邮件")
 
                     # 从内容中提取验证码
-                    # 匹配格式: "Your verification code is: 529891"
-                    patterns = [
-                        r'verification code is:\s*(\d{6})',
-                        r'verification code is:\s*<b>(\d{6})</b>',
-                        r'code is:\s*(\d{6})',
-                        r'code:\s*(\d{6})',
-                        r'(\d{6})',  # 最后尝试匹配任意6位数字
-                    ]
-
-                    for pattern in patterns:
-                        match = re.search(pattern, content, re.IGNORECASE)
+                    for pattern in _CODE_PATTERNS:
+                        match = pattern.search(content)
                         if match:
                             code = match.group(1)
                             print(f"   ✓ 找到验证码: {code}")
@@ -400,21 +1103,16 @@ def get_verification_code_from_email(email):
                     print(f"   ⚠️  未能从邮件内容中提取验证码")
                     print(f"   📄 邮件内容预览: {content[:200]}...")
 
-            print(f"   ⚠️  未找到Augment邮件，等待3秒后重试...")
-            human_delay(3.0)
-
-        except HTTPError as e:
-            print(f"   ✗ HTTP错误: {e.code} {e.reason}")
-            if attempt < max_retries - 1:
-                human_delay(3.0)
-        except URLError as e:
-            print(f"   ✗ 网络错误: {e.reason}")
-            if attempt < max_retries - 1:
-                human_delay(3.0)
+            print(f"   ⚠️  未找到Augment邮件，稍后重试...")
+
+        except (http.client.HTTPException, OSError) as e:
+            # 连接可能已被服务端关闭，关闭后下次请求会自动重连
+            conn.close()
+            print(f"   ✗ 网络错误: {e}")
         except Exception as e:
+            # 连接状态未知，关闭后下次请求重连
+            conn.close()
             print(f"   ✗ 错误: {e}")
-            if attempt < max_retries - 1:
-                human_delay(3.0)
 
     print(f"   ✗ 获取验证码失败（已尝试{max_retries}次）")
     return None
@@ -432,120 +1130,34 @@ def click_continue_button(cdp, session_id):
     """
     print("   🔍 查找Continue按钮...")
 
-    # 方法1: JavaScript文本匹配点击
-    result = cdp.send("Runtime.evaluate", {
-        "expression": """
-            (() => {
-                // 查找所有可能的按钮元素
-                const elements = Array.from(document.querySelectorAll('button, a, input[type="submit"], input[type="button"]'));
-
-                for (const el of elements) {
-                    const text = (el.textContent || el.value || '').toLowerCase();
-                    const ariaLabel = (el.getAttribute('aria-label') || '').toLowerCase();
-
-                    // 匹配 "continue" 或 "next"
-                    if (text.includes('continue') || text.includes('next') ||
-                        ariaLabel.includes('continue') || ariaLabel.includes('next')) {
-                        el.click();
-                        return true;
-                    }
-                }
-
-                return false;
-            })()
-        """,
-        "returnByValue": True
-    }, session_id=session_id)
-
-    if result and "result" in result and "result" in result["result"]:
-        success = result["result"]["result"].get("value")
-        if success:
-            print("   ✓ JavaScript点击Continue成功")
-            return True
-
-    # 方法2: 使用DOM API查找并点击
-    print("   🔍 尝试使用DOM API...")
+    # 方法1: JavaScript文本匹配点击（按钮未就绪时在页面内等待，一次往返完成）
+    result = _run_script(cdp, session_id, "continue_click", _CONTINUE_CLICK_JS, await_promise=True)
 
-    result = cdp.send("DOM.getDocument", {"depth": -1}, session_id=session_id)
-    if not result or "result" not in result:
-        print("   ✗ 无法获取DOM文档")
-        return False
-
-    root_node_id = result["result"]["root"]["nodeId"]
-
-    # 查找所有button和a元素
-    result = cdp.send("DOM.querySelectorAll", {
-        "nodeId": root_node_id,
-        "selector": "button, a, input[type='submit'], input[type='button']"
-    }, session_id=session_id)
-
-    if not result or "result" not in result or not result["result"].get("nodeIds"):
-        print("   ✗ 未找到任何按钮元素")
-        return False
-
-    node_ids = result["result"]["nodeIds"]
-    print(f"   📋 找到 {len(node_ids)} 个可点击元素")
-
-    # 遍历所有元素，查找包含"continue"或"next"的
-    for node_id in node_ids:
-        # 获取元素的外部HTML
-        result = cdp.send("DOM.getOuterHTML", {"nodeId": node_id}, session_id=session_id)
-
-        if result and "result" in result:
-            html = result["result"].get("outerHTML", "").lower()
-            if "continue" in html or "next" in html:
-                print(f"   ✓ 找到Continue按钮")
-
-                # 获取元素位置并点击
-                box_result = cdp.send("DOM.getBoxModel", {"nodeId": node_id}, session_id=session_id)
-
-                if box_result and "result" in box_result:
-                    box_model = box_result["result"]["model"]
-                    content = box_model["content"]
-                    x = (content[0] + content[4]) / 2
-                    y = (content[1] + content[5]) / 2
-
-                    print(f"   📍 按钮位置: ({x:.1f}, {y:.1f})")
-
-                    # 发送点击事件（人类化）
-                    cdp.send("Input.dispatchMouseEvent", {
-                        "type": "mouseMoved",
-                        "x": x,
-                        "y": y
-                    }, session_id=session_id)
-
-                    human_delay(0.1, jitter_percent=0.5)
-
-                    cdp.send("Input.dispatchMouseEvent", {
-                        "type": "mousePressed",
-                        "x": x,
-                        "y": y,
-                        "button": "left",
-                        "clickCount": 1
-                    }, session_id=session_id)
+    success = _value(result)
+    if success:
+        print("   ✓ JavaScript点击Continue成功")
+        return True
 
-                    human_delay(0.05, jitter_percent=0.5)
+    # 方法2: 浏览器原生XPath按文本定位按钮，再用CDP鼠标事件点击
+    print("   🔍 尝试使用鼠标事件点击...")
 
-                    cdp.send("Input.dispatchMouseEvent", {
-                        "type": "mouseReleased",
-                        "x": x,
-                        "y": y,
-                        "button": "left",
-                        "clickCount": 1
-                    }, session_id=session_id)
+    point = locate_button_by_text(cdp, session_id, "continue", "next")
+    if point:
+        print(f"   ✓ 找到Continue按钮")
 
-                    print("   ✓ CDP点击Continue完成")
-                    return True
+    if point and dispatch_click(cdp, session_id, *point, move=False):
+        print("   ✓ CDP点击Continue完成")
+        return True
 
     print("   ✗ 未找到Continue按钮")
     return False
 
 
-def switch_to_augment_and_signin(ws_url, email):
+def switch_to_augment_and_signin(session, email):
     """切换到Augment登录页面，点击Sign in并填写邮箱
 
     Args:
-        ws_url (str): WebSocket地址
+        session (AugmentSession): 共用的CDP会话
         email (str): 要填写的邮箱地址
 
     Returns:
@@ -553,369 +1165,207 @@ def switch_to_augment_and_signin(ws_url, email):
     """
     print(f"\n🔄 正在切换到Augment登录页面...")
 
-    cdp = CDPClient(ws_url)
+    cdp = session.cdp
 
-    try:
-        # 步骤1: 查找Augment登录页面
-        print("   📋 步骤1: 查找Augment登录页面...")
-        result = cdp.send("Target.getTargets", {})
-        if not result or "result" not in result:
-            print("   ✗ 无法获取 targets")
-            return False
+    # 步骤1: 查找Augment登录页面
+    print("   📋 步骤1: 查找Augment登录页面...")
+
+    # 根据URL查找Augment页面
+    augment_target = session.find_target(_AUGMENT_RE)
+    if not augment_target:
+        print("   ✗ 未找到Augment登录页面")
+        return False
 
-        targets = result["result"]["targetInfos"]
+    print(f"   ✓ 找到Augment登录页面!")
 
-        # 根据URL查找Augment页面
-        augment_target = None
-        for target in targets:
-            if target.get("type") == "page":
-                url = target.get("url", "")
-                print(f"   📄 发现页面: {url}")
-                if "login.augmentcode.com" in url or "augmentcode.com" in url:
-                    augment_target = target
-                    print(f"   ✓ 找到Augment登录页面!")
-                    break
-
-        if not augment_target:
-            print("   ✗ 未找到Augment登录页面")
-            return False
+    target_id = augment_target["targetId"]
+    print(f"   ✓ 目标页面ID: {target_id}")
 
-        target_id = augment_target["targetId"]
-        print(f"   ✓ 目标页面ID: {target_id}")
+    # 步骤2-3: 激活并附加到Augment页面（会话按页面缓存，验证码等后续步骤直接复用）
+    print("   🔗 步骤2-3: 激活并连接到Augment页面...")
+    session_id = session.attach(target_id)
+    if not session_id:
+        print("   ✗ 无法附加到 target")
+        return False
+    print("   ✓ 连接成功")
 
-        # 步骤2: 激活Augment页面
-        print("   🎯 步骤2: 激活Augment页面...")
-        cdp.send("Target.activateTarget", {"targetId": target_id})
-        human_delay(1.0)  # 等待激活完成（人类化延迟）
-        print("   ✓ 页面已激活")
+    # 步骤4: 等待页面加载（加载完成即继续，最多2秒）
+    print("   ⏳ 步骤4: 等待页面加载...")
+    wait_for_page_condition(cdp, session_id, _PAGE_LOADED_CONDITION, timeout=2.0)
+    print("   ✓ 页面加载完成")
 
-        # 步骤3: 附加到 target
-        print("   🔗 步骤3: 连接到页面...")
-        result = cdp.send("Target.attachToTarget", {
-            "targetId": target_id,
-            "flatten": True
-        })
+    # 步骤5: 查找并点击Sign in按钮
+    print("   🖱️  步骤5: 查找Sign in按钮...")
 
-        if not result or "result" not in result:
-            print("   ✗ 无法附加到 target")
-            return False
+    # 点击前订阅加载事件，避免跳转过快漏掉
+    loads = cdp.subscribe("Page.loadEventFired")
 
-        session_id = result["result"]["sessionId"]
-        print("   ✓ 连接成功")
-
-        # 步骤4: 启用必要的域
-        print("   ⏳ 步骤4: 等待页面加载...")
-        cdp.send("Page.enable", {}, session_id=session_id)
-        cdp.send("DOM.enable", {}, session_id=session_id)
-        cdp.send("Runtime.enable", {}, session_id=session_id)
-        human_delay(2.0)  # 等待页面加载（人类化延迟）
-        print("   ✓ 页面加载完成")
-
-        # 步骤5: 查找并点击Sign in按钮
-        print("   🖱️  步骤5: 查找Sign in按钮...")
-
-        # 尝试多种选择器
-        selectors = [
-            'button:contains("Sign in")',
-            'button:contains("sign in")',
-            'a:contains("Sign in")',
-            'a:contains("sign in")',
-            'button[type="submit"]',
-            'input[type="submit"]',
-            'button',
-            'a[href*="login"]',
-            'a[href*="signin"]'
-        ]
-
-        clicked = False
-        for selector in selectors:
-            # 使用JavaScript查找并点击按钮
-            result = cdp.send("Runtime.evaluate", {
-                "expression": f"""
-                    (() => {{
-                        // 方法1: 使用文本内容查找
-                        const buttons = Array.from(document.querySelectorAll('button, a, input[type="submit"]'));
-                        for (const btn of buttons) {{
-                            const text = btn.textContent || btn.value || '';
-                            if (text.toLowerCase().includes('sign in') || text.toLowerCase().includes('signin')) {{
-                                btn.click();
-                                return true;
-                            }}
-                        }}
-
-                        // 方法2: 查找特定选择器
-                        const element = document.querySelector('{selector}');
-                        if (element) {{
-                            element.click();
-                            return true;
-                        }}
-
-                        return false;
-                    }})()
-                """,
-                "returnByValue": True
-            }, session_id=session_id)
+    # 方法1: 按文本内容查找并点击（与选择器无关，只需执行一次）
+    result = cdp.send("Runtime.evaluate", {
+        "expression": _SIGNIN_TEXT_CLICK_JS,
+        "returnByValue": True
+    }, session_id=session_id)
 
-            if result and "result" in result and "result" in result["result"]:
-                success = result["result"]["result"].get("value")
-                if success:
-                    print(f"   ✓ 成功点击Sign in按钮!")
-                    clicked = True
-                    break
+    clicked = bool(_value(result))
 
-        if not clicked:
-            print("   ⚠️  未找到Sign in按钮，尝试使用DOM API...")
+    # 方法2: 在页面内按顺序尝试所有选择器，一次往返完成
+    if not clicked:
+        result = cdp.send("Runtime.evaluate", {
+            "expression": _SIGNIN_SELECTOR_CLICK_JS,
+            "returnByValue": True
+        }, session_id=session_id)
 
-            # 使用DOM API查找按钮
-            result = cdp.send("DOM.getDocument", {"depth": -1}, session_id=session_id)
-            if result and "result" in result:
-                root_node_id = result["result"]["root"]["nodeId"]
-
-                # 查找所有button元素
-                result = cdp.send("DOM.querySelectorAll", {
-                    "nodeId": root_node_id,
-                    "selector": "button, a, input[type='submit']"
-                }, session_id=session_id)
-
-                if result and "result" in result and result["result"].get("nodeIds"):
-                    node_ids = result["result"]["nodeIds"]
-                    print(f"   📋 找到 {len(node_ids)} 个可点击元素")
-
-                    # 遍历所有元素，查找包含"sign in"的
-                    for node_id in node_ids:
-                        # 获取元素的外部HTML
-                        result = cdp.send("DOM.getOuterHTML", {
-                            "nodeId": node_id
-                        }, session_id=session_id)
-
-                        if result and "result" in result:
-                            html = result["result"].get("outerHTML", "").lower()
-                            if "sign in" in html or "signin" in html:
-                                # 获取元素位置并点击
-                                box_result = cdp.send("DOM.getBoxModel", {
-                                    "nodeId": node_id
-                                }, session_id=session_id)
-
-                                if box_result and "result" in box_result:
-                                    box_model = box_result["result"]["model"]
-                                    content = box_model["content"]
-                                    x = (content[0] + content[4]) / 2
-                                    y = (content[1] + content[5]) / 2
-
-                                    # 发送点击事件
-                                    cdp.send("Input.dispatchMouseEvent", {
-                                        "type": "mouseMoved",
-                                        "x": x,
-                                        "y": y
-                                    }, session_id=session_id)
-
-                                    cdp.send("Input.dispatchMouseEvent", {
-                                        "type": "mousePressed",
-                                        "x": x,
-                                        "y": y,
-                                        "button": "left",
-                                        "clickCount": 1
-                                    }, session_id=session_id)
-
-                                    cdp.send("Input.dispatchMouseEvent", {
-                                        "type": "mouseReleased",
-                                        "x": x,
-                                        "y": y,
-                                        "button": "left",
-                                        "clickCount": 1
-                                    }, session_id=session_id)
-
-                                    print(f"   ✓ 成功点击Sign in按钮!")
-                                    clicked = True
-                                    break
+        matched = _value(result)
+        if matched:
+            print(f"   ✓ 通过选择器点击: {matched}")
+            clicked = True
 
-        if not clicked:
-            print("   ✗ 未能点击Sign in按钮")
-            return False
+    if clicked:
+        print(f"   ✓ 成功点击Sign in按钮!")
 
-        # 步骤6: 等待页面跳转并填写work mail
-        print("   ⏳ 步骤6: 等待页面跳转...")
-        human_delay(3.0)  # 等待页面跳转（人类化延迟）
-        print("   ✓ 页面跳转完成")
-
-        # 步骤7: 等待并检测work mail输入框加载
-        print("   ⏳ 步骤7: 等待work mail输入框加载...")
-
-        # 尝试多种选择器查找work mail输入框
-        selectors = [
-            'input[name*="email"]',
-            'input[type="email"]',
-            'input[placeholder*="email"]',
-            'input[placeholder*="Email"]',
-            'input[placeholder*="work"]',
-            'input[placeholder*="Work"]',
-            'input[id*="email"]',
-            'input[id*="Email"]',
-            'input[name="email"]',
-            'input[type="text"]'
-        ]
-
-        # 轮询检测输入框是否加载（最多等待10秒）
-        input_loaded = False
-        max_wait = 10
-        for attempt in range(max_wait):
-            for selector in selectors:
-                result = cdp.send("Runtime.evaluate", {
-                    "expression": f"""
-                        (() => {{
-                            const input = document.querySelector('{selector}');
-                            return input !== null;
-                        }})()
-                    """,
-                    "returnByValue": True
-                }, session_id=session_id)
-
-                if result and "result" in result and "result" in result["result"]:
-                    found = result["result"]["result"].get("value")
-                    if found:
-                        print(f"   ✓ 输入框已加载（用时{attempt + 1}秒）")
-                        input_loaded = True
-                        break
-
-            if input_loaded:
-                break
+    if not clicked:
+        print("   ⚠️  未找到Sign in按钮，尝试使用DOM API...")
 
-            # 显示等待进度
-            if attempt < max_wait - 1:
-                print(f"   ⏳ 等待中... ({attempt + 1}秒)")
-                human_delay(1.0)
+        # 浏览器原生XPath按文本查找，再用鼠标事件点击
+        point = locate_button_by_text(cdp, session_id, "sign in", "signin")
+        if point and dispatch_click(cdp, session_id, *point, move=False):
+            print(f"   ✓ 成功点击Sign in按钮!")
+            clicked = True
 
-        if not input_loaded:
-            print(f"   ⚠️  输入框未加载（已等待{max_wait}秒）")
-            print("   💡 提示: 可能需要手动填写邮箱地址")
-            return False
+    if not clicked:
+        cdp.unsubscribe(loads)
+        print("   ✗ 未能点击Sign in按钮")
+        return False
 
-        # 步骤8: 填写work mail输入框
-        print("   ✍️  步骤8: 填写work mail...")
-
-        filled = False
-        for selector in selectors:
-            result = cdp.send("Runtime.evaluate", {
-                "expression": f"""
-                    (() => {{
-                        const input = document.querySelector('{selector}');
-                        if (input) {{
-                            input.value = '{email}';
-                            input.dispatchEvent(new Event('input', {{ bubbles: true }}));
-                            input.dispatchEvent(new Event('change', {{ bubbles: true }}));
-                            return true;
-                        }}
-                        return false;
-                    }})()
-                """,
-                "returnByValue": True
-            }, session_id=session_id)
+    # 步骤6: 等待页面跳转：新页面触发load即继续，最多3秒；
+    # 单页应用内跳转没有load事件，由步骤7的输入框检测兜底
+    print("   ⏳ 步骤6: 等待页面跳转...")
+    cdp.wait_event(loads, lambda m: m.get("sessionId") == session_id, timeout=3.0)
+    cdp.unsubscribe(loads)
+    print("   ✓ 页面跳转完成")
 
-            if result and "result" in result and "result" in result["result"]:
-                success = result["result"]["result"].get("value")
-                if success:
-                    print(f"   ✓ 成功填写邮箱: {email}")
-                    filled = True
-                    break
+    # 步骤7: 等待并检测work mail输入框加载
+    print("   ⏳ 步骤7: 等待work mail输入框加载...")
 
-        if not filled:
-            print("   ⚠️  未找到work mail输入框，尝试使用DOM API...")
+    # 尝试多种选择器查找work mail输入框
+    selectors = [
+        'input[name*="email"]',
+        'input[type="email"]',
+        'input[placeholder*="email"]',
+        'input[placeholder*="Email"]',
+        'input[placeholder*="work"]',
+        'input[placeholder*="Work"]',
+        'input[id*="email"]',
+        'input[id*="Email"]',
+        'input[name="email"]',
+        _GENERIC_INPUT_SELECTOR
+    ]
 
-            # 使用DOM API查找输入框
-            result = cdp.send("DOM.getDocument", {"depth": -1}, session_id=session_id)
-            if result and "result" in result:
-                root_node_id = result["result"]["root"]["nodeId"]
-
-                # 查找所有input元素
-                result = cdp.send("DOM.querySelectorAll", {
-                    "nodeId": root_node_id,
-                    "selector": "input"
-                }, session_id=session_id)
-
-                if result and "result" in result and result["result"].get("nodeIds"):
-                    node_ids = result["result"]["nodeIds"]
-                    print(f"   📋 找到 {len(node_ids)} 个输入框")
-
-                    # 遍历所有输入框，查找包含"email"或"work"的
-                    for node_id in node_ids:
-                        # 获取元素的外部HTML
-                        result = cdp.send("DOM.getOuterHTML", {
-                            "nodeId": node_id
-                        }, session_id=session_id)
-
-                        if result and "result" in result:
-                            html = result["result"].get("outerHTML", "").lower()
-                            if "email" in html or "work" in html or 'type="text"' in html:
-                                # 使用JavaScript设置值
-                                result = cdp.send("Runtime.evaluate", {
-                                    "expression": f"""
-                                        (() => {{
-                                            const inputs = document.querySelectorAll('input');
-                                            for (const input of inputs) {{
-                                                const html = input.outerHTML.toLowerCase();
-                                                if (html.includes('email') || html.includes('work') || input.type === 'text' || input.type === 'email') {{
-                                                    input.value = '{email}';
-                                                    input.dispatchEvent(new Event('input', {{ bubbles: true }}));
-                                                    input.dispatchEvent(new Event('change', {{ bubbles: true }}));
-                                                    return true;
-                                                }}
-                                            }}
-                                            return false;
-                                        }})()
-                                    """,
-                                    "returnByValue": True
-                                }, session_id=session_id)
-
-                                if result and "result" in result and "result" in result["result"]:
-                                    success = result["result"]["result"].get("value")
-                                    if success:
-                                        print(f"   ✓ 成功填写邮箱: {email}")
-                                        filled = True
-                                        break
-
-        if not filled:
-            print("   ✗ 未能填写work mail")
-            print("   💡 提示: 请手动填写邮箱地址")
-            return False
+    # 轮询检测输入框是否加载（最多等待10秒）
+    # 所有选择器合并成一个选择器列表，每轮只需一次CDP往返
+    probe_expression = f"document.querySelector({json.dumps(','.join(selectors))}) !== null"
+    # 指数退避：开始时高频检测（100ms），之后逐步放慢，最长1秒一次
+    input_loaded = False
+    max_wait = 10
+    delay = 0.1
+    start_time = time.monotonic()
+    while True:
+        result = cdp.send("Runtime.evaluate", {
+            "expression": probe_expression,
+            "returnByValue": True
+        }, session_id=session_id)
 
-        # 步骤9: 点击Cloudflare验证框
-        print("   🛡️  步骤9: 处理Cloudflare验证...")
-        print("   ⏳ 等待验证框加载...")
-        human_delay(5.0, jitter_percent=0.2)  # 等待验证框加载（人类化延迟，5秒±20%）
-
-        verify_success = click_cloudflare_verify(cdp, session_id)
-        if verify_success:
-            print("   ✓ Cloudflare验证框已点击")
-            # 等待验证完成
-            print("   ⏳ 等待验证完成...")
-            human_delay(5.0, jitter_percent=0.2)  # 等待验证完成（人类化延迟，5秒±20%）
-        else:
-            print("   ⚠️  未找到验证框或点击失败")
-            print("   💡 提示: 验证框可能还未加载，或已经完成验证，或需要手动操作")
+        found = _value(result)
+        if found:
+            print(f"   ✓ 输入框已加载（用时{time.monotonic() - start_time:.1f}秒）")
+            input_loaded = True
+            break
 
-        # 步骤10: 点击Continue按钮
-        print("   ➡️  步骤10: 查找并点击Continue按钮...")
-        human_delay(2.0)  # 等待页面更新
+        elapsed = time.monotonic() - start_time
+        if elapsed >= max_wait:
+            break
 
-        continue_success = click_continue_button(cdp, session_id)
-        if continue_success:
-            print("   ✓ Continue按钮已点击")
-        else:
-            print("   ⚠️  未找到Continue按钮")
-            print("   💡 提示: 可能需要手动点击Continue")
+        # 显示等待进度
+        print(f"   ⏳ 等待中... ({elapsed:.1f}秒)")
+        _internal_sleep(delay)
+        delay = min(delay * 1.5, 1.0)
 
-        print("   ✓ 所有操作完成!")
-        return True
+    if not input_loaded:
+        print(f"   ⚠️  输入框未加载（已等待{max_wait}秒）")
+        print("   💡 提示: 可能需要手动填写邮箱地址")
+        return False
 
-    finally:
-        cdp.close()
+    # 步骤8: 填写work mail输入框
+    print("   ✍️  步骤8: 填写work mail...")
+
+    # 本站上次命中的选择器排到最前
+    host = urlsplit(cdp.targets.get(target_id, {}).get("url", "")).hostname or ""
+    hint = _load_selector_hint(host)
+    if hint in selectors:
+        selectors.remove(hint)
+        selectors.insert(0, hint)
+
+    # 页面辅助函数按优先级尝试所有选择器，一次evaluate完成；
+    # 邮箱只作为JSON参数传入，不拼接进函数体
+    matched = session.call_helper(session_id, "fillFirst", selectors, email)
+    filled = bool(matched)
+    if filled:
+        print(f"   ✓ 成功填写邮箱: {email}")
+        if host:
+            _save_selector_hint(host, matched)
+
+    if not filled:
+        print("   ⚠️  未找到work mail输入框，尝试按输入框特征匹配...")
+
+        # 页面内一次遍历所有input，按 email/work/text 特征匹配并填写，
+        # 不再逐个节点 DOM.getOuterHTML 往返
+        filled = bool(session.call_helper(session_id, "fillEmailLike", email))
+        if filled:
+            print(f"   ✓ 成功填写邮箱: {email}")
+
+    if not filled:
+        print("   ✗ 未能填写work mail")
+        print("   💡 提示: 请手动填写邮箱地址")
+        return False
 
+    # 步骤9: 点击Cloudflare验证框
+    print("   🛡️  步骤9: 处理Cloudflare验证...")
+    print("   ⏳ 等待验证框加载...")
+    # 验证框渲染即继续（最多5秒），再留一段人类化的反应时间（1秒±20%）
+    wait_for_page_condition(cdp, session_id, _CF_READY_CONDITION, timeout=5.0)
+    human_delay(1.0, jitter_percent=0.2)
+
+    verify_success = click_cloudflare_verify(cdp, session_id)
+    if verify_success:
+        print("   ✓ Cloudflare验证框已点击")
+        # 等待验证完成：页面写入验证令牌即返回，最多10秒
+        print("   ⏳ 等待验证完成...")
+        if wait_for_page_condition(cdp, session_id, _CF_DONE_CONDITION, timeout=10.0):
+            print("   ✓ Cloudflare验证已完成")
+        else:
+            print("   ⚠️  未检测到验证令牌，继续尝试")
+    else:
+        print("   ⚠️  未找到验证框或点击失败")
+        print("   💡 提示: 验证框可能还未加载，或已经完成验证，或需要手动操作")
+
+    # 步骤10: 点击Continue按钮
+    print("   ➡️  步骤10: 查找并点击Continue按钮...")
+    continue_success = click_continue_button(cdp, session_id)
+    if continue_success:
+        print("   ✓ Continue按钮已点击")
+    else:
+        print("   ⚠️  未找到Continue按钮")
+        print("   💡 提示: 可能需要手动点击Continue")
 
-def wait_for_onboard_redirect(ws_url, max_wait_seconds=60):
+    print("   ✓ 所有操作完成!")
+    return True
+
+
+def wait_for_onboard_redirect(session, max_wait_seconds=60):
     """等待login页面跳转到onboard页面
 
     Args:
-        ws_url (str): WebSocket地址
+        session (AugmentSession): 共用的CDP会话
         max_wait_seconds (int): 最大等待时间（秒）
 
     Returns:
@@ -923,212 +1373,140 @@ def wait_for_onboard_redirect(ws_url, max_wait_seconds=60):
     """
     print(f"\n⏳ 等待页面从login跳转到onboard...")
 
-    cdp = CDPClient(ws_url)
+    cdp = session.cdp
 
+    # 先订阅再检查当前页面，避免跳转恰好发生在两者之间而漏掉事件
+    events = cdp.subscribe("Target.targetCreated", "Target.targetInfoChanged")
     try:
-        start_time = time.time()
-        last_url = ""
-
-        while time.time() - start_time < max_wait_seconds:
-            # 获取所有页面
-            result = cdp.send("Target.getTargets", {})
-            if not result or "result" not in result:
-                human_delay(1.0)
-                continue
-
-            targets = result["result"]["targetInfos"]
-
-            # 查找login或onboard页面
-            for target in targets:
-                if target.get("type") == "page":
-                    url = target.get("url", "")
+        # 连接时已开启目标发现，目标表中包含现有的所有页面
+        target = find_target_by_url(cdp, _ONBOARD_RE)
+        if target:
+            print(f"   ✓ 页面已跳转到: {target['url']}")
+            return True
 
-                    # 检查是否跳转到onboard
-                    if "app.augmentcode.com/onboard" in url:
-                        print(f"   ✓ 页面已跳转到: {url}")
-                        return True
+        # 每个页面最近一次的URL，仅用于输出login页面的变化
+        seen_urls = {}
 
-                    # 显示当前login页面URL（如果变化了）
-                    if "login.augmentcode.com" in url and url != last_url:
-                        print(f"   📍 当前页面: login.augmentcode.com/...")
-                        last_url = url
+        def is_onboard(msg):
+            info = msg["params"]["targetInfo"]
+            url = info.get("url", "")
+            if info.get("type") != "page":
+                return False
+            if _ONBOARD_RE.search(url):
+                return True
+            if "login.augmentcode.com" in url and seen_urls.get(info["targetId"]) != url:
+                print(f"   📍 当前页面: login.augmentcode.com/...")
+            seen_urls[info["targetId"]] = url
+            return False
 
-            # 显示等待进度
-            elapsed = int(time.time() - start_time)
-            if elapsed % 5 == 0:  # 每5秒显示一次
-                print(f"   ⏳ 等待中... ({elapsed}秒)")
-            human_delay(2.0)
+        # 页面创建或URL变化时浏览器主动推送事件，命中即返回
+        msg = cdp.wait_event(events, is_onboard, timeout=max_wait_seconds)
+        if msg:
+            print(f"   ✓ 页面已跳转到: {msg['params']['targetInfo']['url']}")
+            return True
 
         print(f"   ✗ 等待超时（{max_wait_seconds}秒）")
         return False
 
     finally:
-        cdp.close()
+        cdp.unsubscribe(events)
 
 
-def get_payment_method_link(ws_url):
+def get_payment_method_link(session):
     """从onboard页面点击Add Payment Method按钮并获取跳转链接
 
     Args:
-        ws_url (str): WebSocket地址
+        session (AugmentSession): 共用的CDP会话
 
     Returns:
         str: 支付方法链接，失败返回None
     """
     print(f"\n🔍 点击Add Payment Method按钮获取链接...")
 
-    cdp = CDPClient(ws_url)
+    cdp = session.cdp
+    # 点击前订阅导航事件，避免跳转发生在订阅之前而漏掉；
+    # 支付页面也可能在新标签页打开，因此同时订阅目标创建/变化事件
+    navigations = cdp.subscribe("Page.frameNavigated", "Target.targetCreated", "Target.targetInfoChanged")
 
     try:
-        # 1. 获取所有页面
-        print("   📄 步骤1: 获取所有页面...")
-        result = cdp.send("Target.getTargets", {})
-        if not result or "result" not in result:
-            print("   ✗ 无法获取页面列表")
+        # 1. 查找并附加到onboard页面（已附加过则直接复用会话）
+        print("   🔗 步骤1: 附加到onboard页面...")
+        session_id = session.attach_onboard()
+        if not session_id:
+            print("   ✗ 未找到onboard页面或无法附加")
             return None
 
-        targets = result["result"]["targetInfos"]
-
-        # 2. 查找onboard页面
-        print("   🔍 步骤2: 查找onboard页面...")
-        onboard_target_id = None
-        for target in targets:
-            if target.get("type") == "page":
-                url = target.get("url", "")
-                if "app.augmentcode.com/onboard" in url:
-                    onboard_target_id = target.get("targetId")
-                    print(f"   ✓ 找到onboard页面: {url}")
-                    break
-
-        if not onboard_target_id:
-            print("   ✗ 未找到onboard页面")
-            return None
-
-        # 3. 激活onboard页面
-        print("   🎯 步骤3: 激活onboard页面...")
-        cdp.send("Target.activateTarget", {"targetId": onboard_target_id})
-        human_delay(1.0)
-
-        # 4. 附加到页面
-        print("   🔗 步骤4: 附加到onboard页面...")
-        result = cdp.send("Target.attachToTarget", {
-            "targetId": onboard_target_id,
-            "flatten": True
-        })
-        if not result or "result" not in result:
-            print("   ✗ 无法附加到页面")
-            return None
-
-        session_id = result["result"]["sessionId"]
         print(f"   ✓ 已附加到页面 (sessionId: {session_id})")
 
-        # 5. 启用必要的域
-        print("   ⚙️  步骤5: 启用必要的域...")
-        cdp.send("DOM.enable", {}, session_id=session_id)
-        cdp.send("Runtime.enable", {}, session_id=session_id)
-        cdp.send("Page.enable", {}, session_id=session_id)
-        cdp.send("Network.enable", {}, session_id=session_id)
-
         # 等待页面完全加载
         print("   ⏳ 等待页面加载...")
-        human_delay(3.0)
+        _internal_sleep(3.0)
 
-        # 6. 查找并点击Add Payment Method按钮
-        print("   🔍 步骤6: 查找Add Payment Method按钮...")
+        # 2. 查找并点击Add Payment Method按钮
+        print("   🔍 步骤2: 查找Add Payment Method按钮...")
 
-        # 先尝试查找按钮
-        result = cdp.send("Runtime.evaluate", {
-            "expression": """
-            (function() {
-                const buttons = Array.from(document.querySelectorAll('button'));
-                const btn = buttons.find(b => b.textContent.includes('Add Payment Method'));
-                if (btn) {
-                    return btn.outerHTML;
-                }
-                return null;
-            })()
-            """,
-            "returnByValue": True
-        }, session_id=session_id)
+        # 浏览器原生XPath按文本查找，鼠标事件点击；失败时退回页面辅助函数（查找+点击一次完成）
+        point = locate_button_by_text(cdp, session_id, "Add Payment Method")
+        if point:
+            print(f"   ✓ 找到按钮")
 
-        if result and "result" in result and "result" in result["result"]:
-            value = result["result"]["result"].get("value")
-            if value:
-                print(f"   ✓ 找到按钮")
-                print(f"   📝 按钮HTML: {value[:100]}...")
-            else:
+            # 3. 点击按钮并监听导航
+            print("   🖱️  步骤3: 点击按钮...")
+            clicked = dispatch_click(cdp, session_id, *point)
+        else:
+            value = session.call_helper(session_id, "clickButtonByText", "Add Payment Method") or {}
+            if not value.get("found"):
                 print("   ✗ 未找到Add Payment Method按钮")
                 return None
-        else:
-            print("   ✗ 未找到Add Payment Method按钮")
-            return None
 
-        # 7. 点击按钮并监听导航
-        print("   🖱️  步骤7: 点击按钮...")
-
-        # 点击按钮
-        click_result = cdp.send("Runtime.evaluate", {
-            "expression": """
-            (function() {
-                const buttons = Array.from(document.querySelectorAll('button'));
-                const btn = buttons.find(b => b.textContent.includes('Add Payment Method'));
-                if (btn) {
-                    btn.click();
-                    return true;
-                }
-                return false;
-            })()
-            """,
-            "returnByValue": True
-        }, session_id=session_id)
+            print(f"   ✓ 找到按钮")
+            print(f"   📝 按钮HTML: {value.get('html', '')[:100]}...")
+            print("   🖱️  步骤3: 点击按钮...")
+            clicked = value.get("clicked")
 
-        if click_result and "result" in click_result and "result" in click_result["result"]:
-            clicked = click_result["result"]["result"].get("value")
-            if clicked:
-                print("   ✓ 按钮已点击")
-            else:
-                print("   ✗ 点击按钮失败")
-                return None
-        else:
+        if not clicked:
             print("   ✗ 点击按钮失败")
             return None
 
-        # 8. 等待页面导航并获取新URL
-        print("   ⏳ 步骤8: 等待页面导航...")
-        human_delay(2.0)  # 等待导航开始
+        print("   ✓ 按钮已点击")
 
-        # 轮询检测URL变化（最多等待10秒）
-        payment_link = None
+        # 4. 等待页面导航并获取新URL
+        print("   ⏳ 步骤4: 等待页面导航...")
+
+        def navigated_url(msg):
+            params = msg.get("params", {})
+            if msg.get("method") == "Page.frameNavigated":
+                # 当前页面的主框架导航
+                frame = params.get("frame", {})
+                if msg.get("sessionId") == session_id and not frame.get("parentId"):
+                    return frame.get("url", "")
+                return ""
+            # 新打开或URL变化的标签页
+            target_info = params.get("targetInfo", {})
+            return target_info.get("url", "") if target_info.get("type") == "page" else ""
+
+        def is_payment_navigation(msg):
+            return bool(_PAYMENT_NAV_RE.search(navigated_url(msg)))
+
+        # 浏览器在导航/新开标签页时主动推送事件，命中即返回（最多等待10秒）
         max_wait = 10
-        for attempt in range(max_wait):
-            # 获取当前所有页面
-            result = cdp.send("Target.getTargets", {})
-            if result and "result" in result:
-                targets = result["result"]["targetInfos"]
-
-                # 查找新打开的页面或URL变化的页面
-                for target in targets:
-                    if target.get("type") == "page":
-                        url = target.get("url", "")
-
-                        # 检查是否是支付相关页面
-                        if "payment" in url.lower() or "billing" in url.lower() or "stripe" in url.lower():
-                            payment_link = url
-                            print(f"   ✓ 检测到导航到支付页面（用时{attempt + 1}秒）")
-                            print(f"   🔗 链接: {payment_link}")
-                            return payment_link
-
-                        # 检查是否URL发生了变化（不再是onboard页面）
-                        if "app.augmentcode.com" in url and "onboard" not in url:
-                            payment_link = url
-                            print(f"   ✓ 检测到页面跳转（用时{attempt + 1}秒）")
-                            print(f"   🔗 链接: {payment_link}")
-                            return payment_link
-
-            # 显示等待进度
-            if attempt < max_wait - 1:
-                print(f"   ⏳ 等待导航... ({attempt + 1}秒)")
-                human_delay(1.0)
+        start_time = time.monotonic()
+        msg = cdp.wait_event(navigations, is_payment_navigation, timeout=max_wait)
+        if msg:
+            payment_link = navigated_url(msg)
+        else:
+            # 事件可能早于订阅到达，最后按同一规则扫描一次目标表
+            target = session.find_target(_PAYMENT_NAV_RE)
+            payment_link = target["url"] if target else None
+
+        if payment_link:
+            elapsed = time.monotonic() - start_time
+            if _PAYMENT_URL_RE.search(payment_link):
+                print(f"   ✓ 检测到导航到支付页面（用时{elapsed:.1f}秒）")
+            else:
+                print(f"   ✓ 检测到页面跳转（用时{elapsed:.1f}秒）")
+            print(f"   🔗 链接: {payment_link}")
+            return payment_link
 
         print(f"   ⚠️  未检测到页面导航（已等待{max_wait}秒）")
         print("   💡 提示: 按钮可能没有触发导航，或导航速度较慢")
@@ -1136,108 +1514,68 @@ def get_payment_method_link(ws_url):
 
     except Exception as e:
         print(f"   ✗ 获取支付方法链接时出错: {e}")
-        import traceback
         traceback.print_exc()
         return None
 
     finally:
-        cdp.close()
+        cdp.unsubscribe(navigations)
 
 
-def get_session_cookie(ws_url):
+def get_session_cookie(session):
     """获取session cookie
 
     Args:
-        ws_url (str): WebSocket地址
+        session (AugmentSession): 共用的CDP会话
 
     Returns:
         str: session值，失败返回None
     """
     print(f"\n🍪 正在获取session cookie...")
 
-    # 1. 连接到浏览器
-    cdp = CDPClient(ws_url)
-
-    try:
-        # 2. 创建新标签页打开auth页面
-        print("   📄 打开auth.augmentcode.com页面...")
-        result = cdp.send("Target.createTarget", {
-            "url": "https://auth.augmentcode.com"
-        })
+    cdp = session.cdp
 
-        if not result or "result" not in result:
-            print("   ✗ 无法创建新标签页")
-            return None
-
-        target_id = result["result"]["targetId"]
-        print(f"   ✓ 新标签页已创建")
-
-        # 等待页面加载
-        print("   ⏳ 等待页面加载...")
-        human_delay(3.0)
-
-        # 3. 激活页面
-        print("   🎯 激活auth页面...")
-        cdp.send("Target.activateTarget", {"targetId": target_id})
-        human_delay(1.0)
-
-        # 4. 附加到 target
-        result = cdp.send("Target.attachToTarget", {
-            "targetId": target_id,
-            "flatten": True
-        })
-
-        if not result or "result" not in result:
-            print("   ✗ 无法附加到 target")
-            return None
-
-        session_id = result["result"]["sessionId"]
-
-        # 5. 启用Network域以获取cookies
-        cdp.send("Network.enable", {}, session_id=session_id)
+    # 1-5. 打开auth页面并附加（启用Network域以获取cookies）
+    print("   📄 打开auth.augmentcode.com页面...")
+    session_id = session.attach_auth()
+    if not session_id:
+        print("   ✗ 无法打开或附加auth页面")
+        return None
 
-        # 6. 获取所有cookies
-        print("   🍪 获取cookies...")
-        result = cdp.send("Network.getAllCookies", {}, session_id=session_id)
+    # 6. 只获取Augment站点的cookies（由浏览器按URL过滤）
+    print("   🍪 获取cookies...")
+    result = cdp.send("Network.getCookies", {"urls": _COOKIE_URLS}, session_id=session_id)
 
-        if not result or "result" not in result:
-            print("   ✗ 无法获取cookies")
-            return None
+    if not result or "result" not in result:
+        print("   ✗ 无法获取cookies")
+        return None
 
-        cookies = result["result"]["cookies"]
-        print(f"   📋 找到 {len(cookies)} 个cookies")
+    cookies = result["result"]["cookies"]
+    print(f"   📋 找到 {len(cookies)} 个cookies")
 
-        # 7. 查找session cookie
-        session_value = None
+    if DEBUG:
         for cookie in cookies:
-            name = cookie.get("name", "")
-            domain = cookie.get("domain", "")
-            value = cookie.get("value", "")
+            print(f"   🍪 Cookie: {cookie.get('name', '')} = {cookie.get('value', '')[:20]}... "
+                  f"(domain: {cookie.get('domain', '')})")
 
-            print(f"   🍪 Cookie: {name} = {value[:20]}... (domain: {domain})")
+    # 7. 查找session cookie
+    session_value = next((c.get("value") for c in cookies
+                          if c.get("name", "").lower() == "session"), None)
 
-            if name.lower() == "session" and "augmentcode.com" in domain:
-                session_value = value
-                print(f"   ✓ 找到session cookie!")
-                print(f"   📝 Session值: {session_value}")
-                break
-
-        if not session_value:
-            print("   ⚠️  未找到session cookie")
-            print("   💡 提示: 可能需要等待登录完成")
-            return None
-
-        return session_value
+    if not session_value:
+        print("   ⚠️  未找到session cookie")
+        print("   💡 提示: 可能需要等待登录完成")
+        return None
 
-    finally:
-        cdp.close()
+    print(f"   ✓ 找到session cookie!")
+    print(f"   📝 Session值: {session_value}")
+    return session_value
 
 
-def fill_verification_code(ws_url, email):
+def fill_verification_code(session, email):
     """获取验证码并填写
 
     Args:
-        ws_url (str): WebSocket地址
+        session (AugmentSession): 共用的CDP会话
         email (str): 邮箱地址
 
     Returns:
@@ -1254,120 +1592,61 @@ def fill_verification_code(ws_url, email):
 
     print(f"   ✓ 验证码: {verification_code}")
 
-    # 2. 连接到浏览器
-    cdp = CDPClient(ws_url)
+    cdp = session.cdp
 
-    try:
-        # 3. 获取Augment页面
-        print("   🔍 查找Augment页面...")
-        result = cdp.send("Target.getTargets", {})
-        if not result or "result" not in result:
-            print("   ✗ 无法获取 targets")
-            return False
-
-        targets = result["result"]["targetInfos"]
-
-        # 根据URL查找Augment页面
-        augment_target = None
-        for target in targets:
-            if target.get("type") == "page":
-                url = target.get("url", "")
-                if "augmentcode.com" in url:
-                    augment_target = target
-                    print(f"   ✓ 找到Augment页面: {url}")
-                    break
-
-        if not augment_target:
-            print("   ✗ 未找到Augment页面")
-            return False
-
-        target_id = augment_target["targetId"]
-
-        # 4. 激活页面
-        print("   🎯 激活Augment页面...")
-        cdp.send("Target.activateTarget", {"targetId": target_id})
-        human_delay(1.0)
-
-        # 5. 附加到 target
-        result = cdp.send("Target.attachToTarget", {
-            "targetId": target_id,
-            "flatten": True
-        })
+    # 2. 查找Augment页面
+    print("   🔍 查找Augment页面...")
+    augment_target = session.find_target(_AUGMENT_RE)
+    if not augment_target:
+        print("   ✗ 未找到Augment页面")
+        return False
 
-        if not result or "result" not in result:
-            print("   ✗ 无法附加到 target")
-            return False
+    print(f"   ✓ 找到Augment页面: {augment_target.get('url', '')}")
 
-        session_id = result["result"]["sessionId"]
+    # 3-6. 激活并附加到页面（登录后同一标签页会跳转到onboard，会话可继续复用）
+    print("   🎯 激活Augment页面...")
+    session_id = session.attach(augment_target["targetId"],
+                                ("Runtime", "DOM", "Page", "Network"))
+    if not session_id:
+        print("   ✗ 无法附加到 target")
+        return False
 
-        # 6. 启用必要的域
-        cdp.send("Runtime.enable", {}, session_id=session_id)
-        cdp.send("DOM.enable", {}, session_id=session_id)
-
-        # 7. 查找并填写验证码输入框
-        print("   ✍️  填写验证码...")
-
-        # 尝试多种选择器
-        selectors = [
-            'input[type="text"]',
-            'input[type="number"]',
-            'input[name*="code"]',
-            'input[name*="verification"]',
-            'input[placeholder*="code"]',
-            'input[placeholder*="verification"]',
-            'input[id*="code"]',
-            'input[id*="verification"]',
-        ]
-
-        filled = False
-        for selector in selectors:
-            result = cdp.send("Runtime.evaluate", {
-                "expression": f"""
-                    (() => {{
-                        const input = document.querySelector('{selector}');
-                        if (input) {{
-                            input.value = '{verification_code}';
-                            input.dispatchEvent(new Event('input', {{ bubbles: true }}));
-                            input.dispatchEvent(new Event('change', {{ bubbles: true }}));
-                            return true;
-                        }}
-                        return false;
-                    }})()
-                """,
-                "returnByValue": True
-            }, session_id=session_id)
+    # 7. 查找并填写验证码输入框
+    print("   ✍️  填写验证码...")
 
-            if result and "result" in result and "result" in result["result"]:
-                success = result["result"]["result"].get("value")
-                if success:
-                    print(f"   ✓ 成功填写验证码: {verification_code}")
-                    filled = True
-                    break
+    # 页面内按优先级尝试所有候选选择器，一次evaluate完成查找和填写；
+    # 失败时退回DOM方式：按合并的选择器列表查找后由浏览器原生输入
+    matched = session.call_helper(session_id, "fillFirst", _CODE_INPUT_SELECTORS, verification_code)
+    filled = bool(matched)
+    if filled:
+        print(f"   ✓ 通过选择器填写: {matched}")
+    else:
+        node_id = session.query_selector(session_id, _CODE_INPUT_SELECTOR)
+        filled = bool(node_id) and session.type_into(session_id, node_id, verification_code)
 
-        if not filled:
-            print("   ⚠️  未找到验证码输入框")
-            print("   💡 提示: 请手动填写验证码")
-            return False
+    if not filled:
+        print("   ⚠️  未找到验证码输入框")
+        print("   💡 提示: 请手动填写验证码")
+        return False
 
-        print("   ✓ 验证码填写完成!")
+    print(f"   ✓ 成功填写验证码: {verification_code}")
+    print("   ✓ 验证码填写完成!")
 
-        # 8. 等待一下，然后点击Continue按钮
-        print("   ⏳ 等待页面更新...")
-        human_delay(2.0)
+    # 8. 等待一下，然后点击Continue按钮
+    print("   ⏳ 等待页面更新...")
+    human_delay(2.0)
 
-        print("   ➡️  点击Continue按钮...")
-        continue_success = click_continue_button(cdp, session_id)
-        if continue_success:
-            print("   ✓ Continue按钮已点击")
-        else:
-            print("   ⚠️  未找到Continue按钮")
-            print("   💡 提示: 可能需要手动点击Continue")
+    print("   ➡️  点击Continue按钮...")
+    continue_success = click_continue_button(cdp, session_id)
+    if continue_success:
+        print("   ✓ Continue按钮已点击")
+    else:
+        print("   ⚠️  未找到Continue按钮")
+        print("   💡 提示: 可能需要手动点击Continue")
 
-        print("   ✓ 所有操作完成!")
-        return True
+    print("   ✓ 所有操作完成!")
+    return True
 
-    finally:
-        cdp.close()
 
 
 def main():
@@ -1399,43 +1678,42 @@ def main():
     # 3. 获取WebSocket地址
     ws_url = result.get("ws")
 
+    # 后续所有步骤共用同一个CDP连接，已附加的页面会话按页面缓存
+    session = AugmentSession(ws_url)
+    cdp = session.cdp
+
     # 4. 使用CDP打开标签页
     print("\n📑 正在打开标签页...")
-    cdp = CDPClient(ws_url)
 
-    try:
-        # 先打开邮箱页面
-        print("   📧 打开邮箱页面...")
-        result = cdp.send("Target.createTarget", {
-            "url": "https://mail.chatgpt.org.uk/"
-        })
-        if result and "result" in result:
-            print("   ✓ 邮箱页面已打开")
-        else:
-            print("   ✗ 邮箱页面打开失败")
-
-        # 等待一下
-        human_delay(1.0)
-
-        # 再打开登录页面
-        print("   🔐 打开登录页面...")
-        result = cdp.send("Target.createTarget", {
-            "url": "https://login.augmentcode.com/"
-        })
-        if result and "result" in result:
-            print("   ✓ 登录页面已打开")
-        else:
-            print("   ✗ 登录页面打开失败")
-
-        # 等待页面加载
-        print("   ⏳ 等待页面加载...")
-        human_delay(3.0)
+    # 先打开邮箱页面
+    print("   📧 打开邮箱页面...")
+    result = cdp.send("Target.createTarget", {
+        "url": "https://mail.chatgpt.org.uk/"
+    })
+    if result and "result" in result:
+        print("   ✓ 邮箱页面已打开")
+    else:
+        print("   ✗ 邮箱页面打开失败")
+
+    # 等待一下
+    _internal_sleep(1.0)
+
+    # 再打开登录页面
+    print("   🔐 打开登录页面...")
+    result = cdp.send("Target.createTarget", {
+        "url": "https://login.augmentcode.com/"
+    })
+    if result and "result" in result:
+        print("   ✓ 登录页面已打开")
+    else:
+        print("   ✗ 登录页面打开失败")
 
-    finally:
-        cdp.close()
+    # 等待页面加载
+    print("   ⏳ 等待页面加载...")
+    _internal_sleep(3.0)
 
     # 5. 获取邮箱地址
-    email = get_email_from_browser(ws_url)
+    email = get_email_from_browser(session)
 
     # 6. 保存邮箱地址
     if email:
@@ -1452,7 +1730,7 @@ def main():
 
     # 7. 切换到Augment页面并点击Sign in，填写邮箱
     if email:
-        success = switch_to_augment_and_signin(ws_url, email)
+        success = switch_to_augment_and_signin(session, email)
         if success:
             print("\n✅ 已切换到Augment登录页面，点击Sign in并填写邮箱!")
         else:
@@ -1461,7 +1739,7 @@ def main():
 
     # 8. 获取验证码并填写
     if email:
-        code_success = fill_verification_code(ws_url, email)
+        code_success = fill_verification_code(session, email)
         if code_success:
             print("\n✅ 验证码已自动填写!")
         else:
@@ -1470,7 +1748,7 @@ def main():
 
     # 9. 等待页面跳转到onboard
     if email:
-        redirect_success = wait_for_onboard_redirect(ws_url, max_wait_seconds=60)
+        redirect_success = wait_for_onboard_redirect(session, max_wait_seconds=60)
         if redirect_success:
             print("\n✅ 页面已成功跳转到onboard!")
         else:
@@ -1478,19 +1756,27 @@ def main():
             print("   💡 提示: 可能需要手动完成验证或等待更长时间")
             email = None  # 标记失败，跳过后续步骤
 
-    # 10. 获取Add Payment Method按钮链接
+    # 10-11. 先在onboard标签页获取支付链接，再打开auth标签页读取session cookie；
+    # 两步共用前台标签页（新标签页会被激活），不能同时进行
+    payment_link = session_value = None
+    if email:
+        payment_link = get_payment_method_link(session)
+        session_value = get_session_cookie(session)
+
+    # 两个结果文件共用同一个时间戳
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    # 10. 保存Add Payment Method按钮链接
     payment_link_success = False
     if email:
-        payment_link = get_payment_method_link(ws_url)
         if payment_link:
             print(f"\n✅ 支付方法链接获取成功!")
             print(f"   🔗 链接: {payment_link}")
 
             # 保存链接到文件
-            link_filename = f"payment_link_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+            link_filename = f"payment_link_{timestamp}.txt"
             try:
-                with open(link_filename, 'w', encoding='utf-8') as f:
-                    f.write(payment_link)
+                Path(link_filename).write_text(payment_link, encoding='utf-8')
                 print(f"   💾 链接已保存到: {link_filename}")
                 payment_link_success = True
             except Exception as e:
@@ -1499,19 +1785,17 @@ def main():
             print("\n⚠️  支付方法链接获取失败")
             print("   💡 提示: 可能需要等待页面加载或手动查找")
 
-    # 11. 获取session cookie
+    # 11. 保存session cookie
     session_success = False
     if email:
-        session = get_session_cookie(ws_url)
-        if session:
+        if session_value:
             print(f"\n✅ Session cookie获取成功!")
-            print(f"   📝 Session值: {session}")
+            print(f"   📝 Session值: {session_value}")
 
             # 保存session到文件
-            session_filename = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+            session_filename = f"session_{timestamp}.txt"
             try:
-                with open(session_filename, 'w', encoding='utf-8') as f:
-                    f.write(session)
+                Path(session_filename).write_text(session_value, encoding='utf-8')
                 print(f"   💾 Session已保存到: {session_filename}")
                 session_success = True
             except Exception as e:
@@ -1520,6 +1804,8 @@ def main():
             print("\n⚠️  Session cookie获取失败")
             print("   💡 提示: 可能需要等待更长时间或手动获取")
 
+    session.close()
+
     # 12. 判断是否自动关闭窗口
     should_auto_close = payment_link_success and session_success
 
@@ -1544,5 +1830,10 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    # 比特浏览器API的进度信息走 logging，按原样输出到终端
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    try:
+        main()
+    finally:
+        CDPClient.close_all()
 
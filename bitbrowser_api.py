@@ -10,38 +10,244 @@
     - 关闭浏览器窗口
     - 查找WebSocket地址
     - CDP客户端封装
+    - asyncio 并发接口（BitBrowserAPIAsync）
 
 依赖：
     pip install websocket-client
+    pip install orjson  # 可选，加速JSON序列化/解析
+    pip install wsaccel  # 可选，websocket-client 检测到后自动使用C实现的帧掩码
 
 作者: AI Assistant
 版本: 1.0
 """
 
 import json
+import re
+import asyncio
 import time
+import logging
+import queue
 import random
+import socket
+import threading
 import websocket
-from urllib.request import urlopen, Request
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
+import http.client
+import ipaddress
+from urllib.parse import urlsplit
 from urllib.error import URLError, HTTPError
 
+# 可选依赖：orjson 直接输出/解析bytes，速度更快；未安装时使用标准库json
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode("utf-8")
+    _loads = json.loads
+
+# CDP连接的套接字选项（websocket-client 默认也会开启，这里固定下来不依赖库的默认值）
+_CDP_SOCKOPT = ((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),)
+
+# 浏览器推送的事件消息的开头（紧凑JSON，method 为第一个字段）
+_EVENT_PREFIX = '{"method":"'
+
+# 模块日志：调用方通过 logging.basicConfig 控制输出级别，级别关闭时不做字符串格式化
+log = logging.getLogger("bitbrowser")
+
+
+def _connect_inet(address, timeout, source_address=None):
+    """直接以 AF_INET 连接IPv4地址，跳过 getaddrinfo 解析"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        if source_address:
+            sock.bind(source_address)
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class _HTTPConnection(http.client.HTTPConnection):
+    """主机为IPv4字面量（如127.0.0.1）时不经过解析器建立连接的 HTTPConnection"""
+
+    def __init__(self, host, port=None, **kwargs):
+        super().__init__(host, port, **kwargs)
+        try:
+            if ipaddress.ip_address(self.host).version == 4:
+                self._create_connection = _connect_inet
+        except ValueError:
+            pass
+
+
+class _CDPWebSocket(websocket.WebSocket):
+    """每一帧都在 write_lock 下写出的 WebSocket
+
+    recv() 收到 ping/close 时会在读线程里自动回复 pong/close 帧，
+    这些控制帧与命令帧共用同一把锁，才不会在套接字上交错。
+    """
+
+    # 由 CDPClient 设置为其 _send_lock（可重入，_write 持锁时再次获取不会死锁）
+    write_lock = None
+
+    def send_frame(self, frame):
+        with self.write_lock:
+            return super().send_frame(frame)
+
+
+class _HTTPPool:
+    """本地HTTP连接池
+
+    比特浏览器本地API和各窗口调试端口都在127.0.0.1上，按 (host, port) 复用
+    keep-alive 连接，避免每次请求重新建立TCP连接。线程安全。
+    出错时抛出与 urlopen 相同的 HTTPError / URLError，调用方的异常处理保持不变。
+    """
+
+    # 每个 (host, port) 最多保留的空闲连接数，超出的连接用完即关
+    MAX_IDLE = 16
+
+    def __init__(self):
+        # 空闲连接 {(host, port): [HTTPConnection, ...]}
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, body=None, headers=None, timeout=10, connect_timeout=None):
+        """发送请求并返回响应体
+
+        Args:
+            method: "GET" / "POST"
+            url: 完整URL
+            body: 请求体（bytes，可选）
+            headers: 请求头（可选）
+            timeout: 读取超时时间（秒）
+            connect_timeout: 建立新连接的超时时间（秒），默认同 timeout
+
+        Returns:
+            bytes: 响应体
+        """
+        parts = urlsplit(url)
+        key = (parts.hostname, parts.port or 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        for attempt in range(2):
+            with self._lock:
+                idle = self._idle.get(key)
+                conn = idle.pop() if idle else None
+            reused = conn is not None
+            if not reused:
+                conn = _HTTPConnection(*key, timeout=connect_timeout or timeout)
+
+            response = None
+            try:
+                if conn.sock is None:
+                    conn.connect()
+                conn.sock.settimeout(timeout)
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                # 复用的空闲连接可能已被服务端关闭：只有在收到任何响应之前连接被断开时
+                # 才换新连接重试一次。超时等其他错误时请求可能已被处理，
+                # 重发会重复执行非幂等的POST（如重复创建/打开窗口），因此不重试
+                if (reused and attempt == 0 and response is None
+                        and isinstance(e, (ConnectionResetError, BrokenPipeError, ConnectionAbortedError))):
+                    continue
+                raise URLError(e)
+
+            if response.will_close:
+                conn.close()
+            else:
+                with self._lock:
+                    idle = self._idle.setdefault(key, [])
+                    if len(idle) < self.MAX_IDLE:
+                        idle.append(conn)
+                        conn = None
+                if conn is not None:
+                    conn.close()
+
+            if response.status >= 400:
+                raise HTTPError(url, response.status, response.reason, response.headers, None)
+            return data
+
+
+_http = _HTTPPool()
+
 
 class CDPClient:
     """Chrome DevTools Protocol 客户端
     
     用于通过WebSocket与浏览器进行CDP通信
     """
+
+    # _handle_event 内部处理的事件，即使无人订阅也必须解析
+    _TRACKED_EVENTS = frozenset((
+        "Target.targetCreated", "Target.targetInfoChanged", "Target.targetDestroyed",
+        "DOM.documentUpdated", "Page.frameNavigated",
+    ))
+
+    # 心跳连续无响应达到该次数才判定连接失效，偶发的卡顿不会关闭连接
+    _HEARTBEAT_MISSES = 3
+
+    # get_client 使用的共享连接 {ws_url: CDPClient}
+    _clients = {}
+    _clients_lock = threading.Lock()
     
-    def __init__(self, ws_url: str, timeout: float = 10.0):
+    def __init__(self, ws_url: str, timeout: float = 10.0,
+                 heartbeat_interval: float = None, on_dead=None):
         """初始化CDP客户端
-        
+
+        连接建立后启动后台读线程：命令响应按ID交给等待中的 send()，
+        事件按 method 分发给 subscribe() 注册的队列。随后开启目标发现，
+        查找页面直接读取本地目标表，无需再调用 Target.getTargets。
+
+        开启心跳时定期发送 Browser.getVersion 测量往返时间，连续多次无响应
+        即判定连接失效，关闭连接并回调 on_dead，避免下一次 send() 白等一个完整超时。
+        连接关闭后不会自动重连，需由 on_dead 的调用方处理，因此默认不开启。
+
         Args:
             ws_url: WebSocket调试地址
             timeout: 超时时间（秒）
+            heartbeat_interval: 心跳间隔（秒），None或0（默认）表示不发送心跳
+            on_dead: 连接失效时的回调，参数为本客户端实例（可选）
         """
-        self.ws = websocket.create_connection(ws_url, timeout=timeout, suppress_origin=True)
+        # CDP 只发送合法的UTF-8文本，跳过逐帧的纯Python UTF-8校验；
+        # 命令帧很小，显式关闭Nagle避免与浏览器的延迟ACK叠加出几十毫秒的等待；
+        # 所有帧（包括读线程在 recv 中自动回复的 pong/close 控制帧）都在 _send_lock 下写出、
+        # 只有读线程调用 recv，因此关闭库内部的收发锁
+        self._send_lock = threading.RLock()
+        self.ws = _CDPWebSocket(sockopt=_CDP_SOCKOPT, enable_multithread=False,
+                                skip_utf8_validation=True)
+        self.ws.write_lock = self._send_lock
         self.ws.settimeout(timeout)
+        self.ws.connect(ws_url, timeout=timeout, suppress_origin=True)
+        self.timeout = timeout
         self._id = 0
+        # 等待响应的命令 {msg_id: Future}
+        self._pending = {}
+        # 事件订阅 {method: [queue.Queue, ...]}
+        self._subscribers = {}
+        self._closed = False
+        # 各会话的文档根节点ID缓存 {session_id: nodeId}
+        self._doc_roots = {}
+        # 目标表 {targetId: TargetInfo}，discover_targets() 之后由事件维护
+        self.targets = {}
+        self._discovering = False
+        # 心跳往返时间的指数滑动平均（秒），尚无数据时为None
+        self.rtt_ewma = None
+        self.on_dead = on_dead
+        self._stop = threading.Event()
+        self._reader = threading.Thread(target=self._read_loop, name="cdp-reader", daemon=True)
+        self._reader.start()
+        if heartbeat_interval:
+            threading.Thread(target=self._heartbeat, args=(heartbeat_interval,),
+                             name="cdp-heartbeat", daemon=True).start()
+        self.discover_targets()
 
     def send(self, method: str, params: dict = None, session_id: str = None):
         """发送CDP命令
@@ -54,31 +260,352 @@ class CDPClient:
         Returns:
             dict: CDP响应结果，失败返回None
         """
-        self._id += 1
-        msg = {"id": self._id, "method": method, "params": params or {}}
-        if session_id:
-            msg["sessionId"] = session_id
+        return self._result(self.send_async(method, params, session_id), self.timeout)
+
+    def send_async(self, method: str, params: dict = None, session_id: str = None):
+        """发送CDP命令，立即返回 Future
+
+        可以先发出多条命令再逐个取结果，让多个请求在同一连接上重叠。
+
+        Args:
+            method: CDP方法名
+            params: 方法参数字典
+            session_id: 会话ID（可选）
+
+        Returns:
+            concurrent.futures.Future: 结果为CDP响应；连接断开时结果为None
+        """
+        future = Future()
+        if self._closed:
+            future.set_result(None)
+            return future
+        try:
+            self._write(method, params, session_id, future)
+        except Exception:
+            future.set_result(None)
+        return future
 
-        self.ws.send(json.dumps(msg))
+    async def asend(self, method: str, params: dict = None, session_id: str = None):
+        """在协程中发送CDP命令
 
-        # 等待响应
-        deadline = time.time() + 10.0
-        while time.time() < deadline:
+        多条命令可用 asyncio.gather 同时发出，由读线程按ID分发响应。
+
+        Args:
+            method: CDP方法名
+            params: 方法参数字典
+            session_id: 会话ID（可选）
+
+        Returns:
+            dict: CDP响应结果，超时或失败返回None
+        """
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(self.send_async(method, params, session_id)),
+                                          self.timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _result(self, future, timeout):
+        """等待 Future 的结果，超时返回None"""
+        try:
+            return future.result(timeout=max(0.0, timeout))
+        except FutureTimeout:
+            return None
+
+    def send_many(self, commands):
+        """流水线发送多条CDP命令
+
+        在一次加锁内连续写出所有命令帧，再统一等待响应，
+        总耗时约为一次往返而不是逐条累加，且不会与其他线程的命令交错。
+
+        Args:
+            commands: [(method, params, session_id), ...]，params 和 session_id 可省略
+
+        Returns:
+            list: 与 commands 顺序对应的响应，失败项为None
+        """
+        futures = [Future() for _ in commands]
+        with self._send_lock:
+            for command, future in zip(commands, futures):
+                if self._closed:
+                    future.set_result(None)
+                    continue
+                try:
+                    self._write(*(tuple(command) + (None, None))[:3], future)
+                except Exception:
+                    future.set_result(None)
+
+        deadline = time.monotonic() + self.timeout
+        return [self._result(future, deadline - time.monotonic()) for future in futures]
+
+    def send_nowait(self, method: str, params: dict = None, session_id: str = None):
+        """发送CDP命令但不等待响应
+
+        适用于不关心返回值的命令（如 Input.dispatchMouseEvent），
+        其响应由读线程直接丢弃。
+
+        Args:
+            method: CDP方法名
+            params: 方法参数字典
+            session_id: 会话ID（可选）
+
+        Returns:
+            int: 本次命令的消息ID；连接已关闭或写入失败返回None
+        """
+        if self._closed:
+            return None
+        try:
+            return self._write(method, params, session_id)
+        except Exception:
+            return None
+
+    def _write(self, method, params, session_id, future=None):
+        """分配消息ID并写入WebSocket
+
+        future 需在写入前登记，否则响应可能先于登记到达。
+        """
+        with self._send_lock:
+            self._id += 1
+            msg_id = self._id
+            msg = {"id": msg_id, "method": method, "params": params or {}}
+            if session_id:
+                msg["sessionId"] = session_id
+            if future is not None:
+                self._pending[msg_id] = future
             try:
-                raw = self.ws.recv()
-                resp = json.loads(raw)
-                if resp.get("id") == self._id:
-                    return resp
+                # CDP只接受文本帧；bytes 按文本帧发送，省去一次解码
+                self.ws.send(_dumps(msg), websocket.ABNF.OPCODE_TEXT)
             except Exception:
+                self._pending.pop(msg_id, None)
+                raise
+        return msg_id
+
+    def subscribe(self, *methods: str):
+        """订阅CDP事件
+
+        须在触发事件的操作之前订阅，避免漏掉事件。
+
+        Args:
+            *methods: 事件名，如 "Page.frameNavigated"，多个事件共用一个队列
+
+        Returns:
+            queue.Queue: 收到的事件消息（含 method、params 和 sessionId）会放入该队列
+        """
+        q = queue.Queue()
+        for method in methods:
+            self._subscribers.setdefault(method, []).append(q)
+        return q
+
+    def unsubscribe(self, q):
+        """取消 subscribe() 注册的事件队列"""
+        for subscribers in self._subscribers.values():
+            if q in subscribers:
+                subscribers.remove(q)
+
+    def discover_targets(self):
+        """开启目标发现（只需一次）
+
+        开启后浏览器会先为现有页面推送 Target.targetCreated，之后持续推送
+        创建/变化/销毁事件，由读线程维护 self.targets。
+        """
+        if not self._discovering:
+            self.send("Target.setDiscoverTargets", {"discover": True})
+            self._discovering = True
+
+    def wait_event(self, q, predicate=None, timeout: float = 10.0):
+        """从事件队列中等待满足条件的事件
+
+        Args:
+            q: subscribe() 返回的队列
+            predicate: 判断函数，接收事件消息，返回True表示命中（None表示任意事件）
+            timeout: 总超时时间（秒）
+
+        Returns:
+            dict: 命中的事件消息，超时或连接断开返回None
+        """
+        deadline = time.monotonic() + timeout
+        while not self._closed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
                 return None
+            try:
+                msg = q.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if predicate is None or predicate(msg):
+                return msg
         return None
 
+    def _read_loop(self):
+        """后台读线程：分发命令响应和事件"""
+        while not self._closed:
+            try:
+                raw = self.ws.recv()
+            except websocket.WebSocketTimeoutException:
+                continue
+            except Exception:
+                break
+
+            # 浏览器推送的事件以 {"method":"..." 开头：无人订阅也无需内部处理的事件
+            # （如大量 Network.*）只截取方法名判断，不做完整的JSON解析
+            if isinstance(raw, str) and raw.startswith(_EVENT_PREFIX):
+                method = raw[len(_EVENT_PREFIX):raw.find('"', len(_EVENT_PREFIX))]
+                if method not in self._TRACKED_EVENTS and not self._subscribers.get(method):
+                    continue
+
+            try:
+                msg = _loads(raw)
+            except ValueError:
+                continue
+
+            if "id" in msg:
+                future = self._pending.pop(msg["id"], None)
+                # 等待方可能已取消（如 asend 超时）
+                if future and not future.done():
+                    future.set_result(msg)
+            elif "method" in msg:
+                self._handle_event(msg)
+                for q in list(self._subscribers.get(msg["method"], ())):
+                    q.put(msg)
+
+        # 连接断开：唤醒所有等待者
+        lost = not self._closed
+        self._closed = True
+        for msg_id in list(self._pending):
+            future = self._pending.pop(msg_id, None)
+            if future and not future.done():
+                future.set_result(None)
+        if lost:
+            self._on_dead()
+
+    def _heartbeat(self, interval):
+        """心跳线程：定期测量往返时间，连续多次无响应时判定连接失效"""
+        misses = 0
+        while not self._stop.wait(interval):
+            start = time.monotonic()
+            resp = self._result(self.send_async("Browser.getVersion"), self.timeout)
+            if self._closed:
+                return
+            if resp is None:
+                misses += 1
+                log.warning("⚠️  CDP心跳无响应（连续%s次）", misses)
+                if misses >= self._HEARTBEAT_MISSES:
+                    self.close()
+                    self._on_dead()
+                    return
+                continue
+            misses = 0
+            rtt = time.monotonic() - start
+            self.rtt_ewma = rtt if self.rtt_ewma is None else 0.9 * self.rtt_ewma + 0.1 * rtt
+
+    def _on_dead(self):
+        """连接失效：停止心跳并通知上层"""
+        self._stop.set()
+        if self.on_dead:
+            try:
+                self.on_dead(self)
+            except Exception:
+                pass
+
+    def get_document_root(self, session_id: str = None):
+        """获取文档根节点ID（按会话缓存）
+
+        只请求根节点（depth=0），不序列化整棵DOM树。
+        页面导航或文档更新后缓存自动失效。
+
+        Args:
+            session_id: 会话ID（可选）
+
+        Returns:
+            int: 根节点ID，失败返回None
+        """
+        node_id = self._doc_roots.get(session_id)
+        if node_id:
+            return node_id
+
+        result = self.send("DOM.getDocument", {"depth": 0}, session_id=session_id)
+        if not result or "result" not in result:
+            return None
+
+        node_id = result["result"]["root"]["nodeId"]
+        self._doc_roots[session_id] = node_id
+        return node_id
+
+    def reset_document_root(self, session_id: str = None):
+        """丢弃缓存的文档根节点ID（节点ID失效时调用）"""
+        self._doc_roots.pop(session_id, None)
+
+    def find_target(self, predicate):
+        """在目标表中查找第一个满足条件的目标（纯内存查找）
+
+        Args:
+            predicate: 判断函数，接收 TargetInfo 字典
+
+        Returns:
+            dict: 匹配的 TargetInfo，未找到返回None
+        """
+        return next((t for t in list(self.targets.values()) if predicate(t)), None)
+
+    def _handle_event(self, msg: dict):
+        """处理CDP事件
+
+        维护目标表；文档更新或主框架导航后，之前获取的节点ID全部失效
+        """
+        method = msg["method"]
+        if method in ("Target.targetCreated", "Target.targetInfoChanged"):
+            info = msg["params"]["targetInfo"]
+            self.targets[info["targetId"]] = info
+        elif method == "Target.targetDestroyed":
+            self.targets.pop(msg["params"]["targetId"], None)
+        elif method == "DOM.documentUpdated" or (
+                method == "Page.frameNavigated"
+                and not msg.get("params", {}).get("frame", {}).get("parentId")):
+            self.reset_document_root(msg.get("sessionId"))
+
+    @classmethod
+    def get_client(cls, ws_url: str):
+        """获取 ws_url 对应的共享客户端
+
+        同一浏览器在整个生命周期内复用一条WebSocket连接，省去重复握手；
+        缓存中的连接已关闭或断开时重新建立。
+
+        Args:
+            ws_url: WebSocket地址
+
+        Returns:
+            CDPClient: 共享的客户端实例
+        """
+        with cls._clients_lock:
+            client = cls._clients.get(ws_url)
+            if client is None or client._closed or not client.ws.connected:
+                client = cls(ws_url)
+                cls._clients[ws_url] = client
+            return client
+
+    @classmethod
+    def close_all(cls):
+        """关闭并清空所有共享客户端"""
+        with cls._clients_lock:
+            clients = list(cls._clients.values())
+            cls._clients.clear()
+        for client in clients:
+            client.close()
+
     def close(self):
-        """关闭WebSocket连接"""
+        """关闭WebSocket连接
+
+        关闭套接字会让读线程的 recv() 立即返回并退出，
+        退出前把所有未完成的 Future 置为None，等待中的 send() 随即返回。
+        """
+        self._closed = True
+        self._stop.set()
         try:
-            self.ws.close()
+            # 关闭帧同样要与其他写入串行
+            with self._send_lock:
+                self.ws.close()
         except Exception:
             pass
+        if self._reader is not threading.current_thread():
+            self._reader.join(timeout=1.0)
 
 
 class BitBrowserAPI:
@@ -88,6 +615,58 @@ class BitBrowserAPI:
     """
     
     BASE_URL = "http://127.0.0.1:54345"
+
+    # 各接口地址、请求头和空请求体（类加载时构造一次）
+    _UPDATE_URL = f"{BASE_URL}/browser/update"
+    _OPEN_URL = f"{BASE_URL}/browser/open"
+    _CLOSE_URL = f"{BASE_URL}/browser/close"
+    _PORTS_URL = f"{BASE_URL}/browser/ports"
+    _HEADERS = {"Content-Type": "application/json"}
+    _EMPTY_JSON = b"{}"
+    _CONNECT_TIMEOUT = 3  # 连接本地API的超时（秒）
+
+    # 比特浏览器窗口ID：32位十六进制字符串
+    _ID_RE = re.compile(r"[0-9a-fA-F]{32}")
+
+    # create_window 透传给 /browser/update 的可选字段
+    _WINDOW_OPTIONS = ("host", "port", "proxyUserName", "proxyPassword", "remark", "url")
+
+    @staticmethod
+    def _valid_id(browser_id):
+        """本地校验窗口ID格式，格式错误时无需请求本地API"""
+        if isinstance(browser_id, str) and BitBrowserAPI._ID_RE.fullmatch(browser_id):
+            return True
+        log.error("❌ 窗口ID格式无效: %r", browser_id)
+        return False
+
+    @staticmethod
+    def _post(url, body, timeout):
+        """向本地API发送JSON请求并解析响应
+
+        本地服务未运行时连接会立即失败，连接超时固定为较短的 _CONNECT_TIMEOUT，
+        timeout 只约束等待响应（如打开窗口）的时间。
+
+        Args:
+            url (str): 接口地址
+            body (bytes): 已序列化的JSON请求体
+            timeout (float): 读取超时时间（秒）
+
+        Returns:
+            dict: 解析后的响应
+        """
+        return _loads(_http.request("POST", url, body, BitBrowserAPI._HEADERS,
+                                    timeout=timeout, connect_timeout=BitBrowserAPI._CONNECT_TIMEOUT))
+
+    @staticmethod
+    def _id_body(browser_id):
+        """构造 {"id": browser_id} 请求体
+
+        窗口ID为比特浏览器生成的ASCII字符串，直接拼接字节跳过JSON编码；
+        含非ASCII或需要转义的字符时回退到 _dumps
+        """
+        if browser_id.isascii() and browser_id.isprintable() and '"' not in browser_id and "\\" not in browser_id:
+            return b'{"id":"' + browser_id.encode("ascii") + b'"}'
+        return _dumps({"id": browser_id})
     
     @staticmethod
     def create_window(name, platform=None, **kwargs):
@@ -120,7 +699,7 @@ class BitBrowserAPI:
             >>>     port=7890
             >>> )
         """
-        print(f"🔨 正在创建窗口: {name}")
+        log.info("🔨 正在创建窗口: %s", name)
 
         # 构建请求数据
         data = {
@@ -134,50 +713,29 @@ class BitBrowserAPI:
         if platform:
             data["platform"] = platform
 
-        # 添加代理配置
-        if "host" in kwargs:
-            data["host"] = kwargs["host"]
-        if "port" in kwargs:
-            data["port"] = kwargs["port"]
-        if "proxyUserName" in kwargs:
-            data["proxyUserName"] = kwargs["proxyUserName"]
-        if "proxyPassword" in kwargs:
-            data["proxyPassword"] = kwargs["proxyPassword"]
-
-        # 添加其他可选参数
-        if "remark" in kwargs:
-            data["remark"] = kwargs["remark"]
-        if "url" in kwargs:
-            data["url"] = kwargs["url"]
-        
+        # 添加代理配置和其他可选参数（只透传白名单内的字段）
+        data.update({key: kwargs[key] for key in BitBrowserAPI._WINDOW_OPTIONS if key in kwargs})
+
         try:
             # 发送创建请求
-            url = f"{BitBrowserAPI.BASE_URL}/browser/update"
-            json_data = json.dumps(data).encode("utf-8")
-            headers = {"Content-Type": "application/json"}
-            
-            req = Request(url, data=json_data, headers=headers, method="POST")
-            response = urlopen(req, timeout=10)
-            result = json.loads(response.read().decode("utf-8"))
+            result = BitBrowserAPI._post(BitBrowserAPI._UPDATE_URL, _dumps(data), timeout=10)
             
             if result.get("success"):
                 browser_id = result.get("data", {}).get("id")
-                print(f"✅ 窗口创建成功！")
-                print(f"   窗口ID: {browser_id}")
+                log.info("✅ 窗口创建成功！\n   窗口ID: %s", browser_id)
                 return browser_id
             else:
-                print(f"❌ 创建失败: {result.get('msg', '未知错误')}")
+                log.warning("❌ 创建失败: %s", result.get("msg", "未知错误"))
                 return None
                 
         except HTTPError as e:
-            print(f"❌ HTTP错误: {e.code} - {e.reason}")
+            log.error("❌ HTTP错误: %s - %s", e.code, e.reason)
             return None
         except URLError as e:
-            print(f"❌ 连接错误: {e.reason}")
-            print("   提示: 请确保比特浏览器客户端正在运行")
+            log.error("❌ 连接错误: %s\n   提示: 请确保比特浏览器客户端正在运行", e.reason)
             return None
         except Exception as e:
-            print(f"❌ 创建失败: {e}")
+            log.error("❌ 创建失败: %s", e)
             return None
 
     @staticmethod
@@ -196,37 +754,32 @@ class BitBrowserAPI:
             >>>     print(f"WebSocket: {result['ws']}")
             >>>     print(f"HTTP: {result['http']}")
         """
-        print(f"\n🚀 正在打开窗口: {browser_id}")
+        log.info("\n🚀 正在打开窗口: %s", browser_id)
+        if not BitBrowserAPI._valid_id(browser_id):
+            return None
         
         try:
             # 发送打开请求
-            url = f"{BitBrowserAPI.BASE_URL}/browser/open"
-            data = json.dumps({"id": browser_id}).encode("utf-8")
-            headers = {"Content-Type": "application/json"}
-            
-            req = Request(url, data=data, headers=headers, method="POST")
-            response = urlopen(req, timeout=30)  # 打开窗口可能需要较长时间
-            result = json.loads(response.read().decode("utf-8"))
+            # 打开窗口可能需要较长时间
+            result = BitBrowserAPI._post(BitBrowserAPI._OPEN_URL, BitBrowserAPI._id_body(browser_id), timeout=30)
             
             if result.get("success"):
                 data = result.get("data", {})
-                print(f"✅ 窗口打开成功！")
-                print(f"   WebSocket: {data.get('ws')}")
-                print(f"   HTTP: {data.get('http')}")
-                print(f"   内核版本: {data.get('coreVersion')}")
+                log.info("✅ 窗口打开成功！\n   WebSocket: %s\n   HTTP: %s\n   内核版本: %s",
+                         data.get("ws"), data.get("http"), data.get("coreVersion"))
                 return data
             else:
-                print(f"❌ 打开失败: {result.get('msg', '未知错误')}")
+                log.warning("❌ 打开失败: %s", result.get("msg", "未知错误"))
                 return None
                 
         except HTTPError as e:
-            print(f"❌ HTTP错误: {e.code} - {e.reason}")
+            log.error("❌ HTTP错误: %s - %s", e.code, e.reason)
             return None
         except URLError as e:
-            print(f"❌ 连接错误: {e.reason}")
+            log.error("❌ 连接错误: %s", e.reason)
             return None
         except Exception as e:
-            print(f"❌ 打开失败: {e}")
+            log.error("❌ 打开失败: %s", e)
             return None
 
     @staticmethod
@@ -244,33 +797,29 @@ class BitBrowserAPI:
             >>> if success:
             >>>     print("窗口已关闭")
         """
-        print(f"\n🔒 正在关闭窗口: {browser_id}")
+        log.info("\n🔒 正在关闭窗口: %s", browser_id)
+        if not BitBrowserAPI._valid_id(browser_id):
+            return False
         
         try:
             # 发送关闭请求
-            url = f"{BitBrowserAPI.BASE_URL}/browser/close"
-            data = json.dumps({"id": browser_id}).encode("utf-8")
-            headers = {"Content-Type": "application/json"}
-            
-            req = Request(url, data=data, headers=headers, method="POST")
-            response = urlopen(req, timeout=10)
-            result = json.loads(response.read().decode("utf-8"))
+            result = BitBrowserAPI._post(BitBrowserAPI._CLOSE_URL, BitBrowserAPI._id_body(browser_id), timeout=10)
             
             if result.get("success"):
-                print(f"✅ 窗口关闭成功！")
+                log.info("✅ 窗口关闭成功！")
                 return True
             else:
-                print(f"❌ 关闭失败: {result.get('msg', '未知错误')}")
+                log.warning("❌ 关闭失败: %s", result.get("msg", "未知错误"))
                 return False
                 
         except HTTPError as e:
-            print(f"❌ HTTP错误: {e.code} - {e.reason}")
+            log.error("❌ HTTP错误: %s - %s", e.code, e.reason)
             return False
         except URLError as e:
-            print(f"❌ 连接错误: {e.reason}")
+            log.error("❌ 连接错误: %s", e.reason)
             return False
         except Exception as e:
-            print(f"❌ 关闭失败: {e}")
+            log.error("❌ 关闭失败: %s", e)
             return False
 
     @staticmethod
@@ -287,50 +836,51 @@ class BitBrowserAPI:
             >>> if ws_url:
             >>>     print(f"WebSocket: {ws_url}")
         """
-        print("🔍 正在查找比特浏览器...")
+        log.info("🔍 正在查找比特浏览器...")
 
         try:
             # 调用 /browser/ports API 获取所有已打开窗口的端口
-            url = f"{BitBrowserAPI.BASE_URL}/browser/ports"
-            data = json.dumps({}).encode("utf-8")
-            headers = {"Content-Type": "application/json"}
-
-            req = Request(url, data=data, headers=headers, method="POST")
-            response = urlopen(req, timeout=5)
-            result = json.loads(response.read().decode("utf-8"))
+            result = BitBrowserAPI._post(BitBrowserAPI._PORTS_URL, BitBrowserAPI._EMPTY_JSON, timeout=5)
 
             if result.get("success") != True:
-                print("✗ 比特浏览器 API 调用失败")
+                log.warning("✗ 比特浏览器 API 调用失败")
                 return None
 
             ports_data = result.get("data") or {}
             if not isinstance(ports_data, dict) or not ports_data:
-                print("✗ 未找到已打开的比特浏览器窗口")
-                print("提示: 请先在比特浏览器中打开一个窗口")
+                log.warning("✗ 未找到已打开的比特浏览器窗口\n提示: 请先在比特浏览器中打开一个窗口")
                 return None
 
-            # 遍历所有端口，获取 WebSocket 地址
+            # 并行探测所有端口，取最先返回的 WebSocket 地址
+            ports = {}
             for browser_id, port in ports_data.items():
                 try:
-                    port_num = int(str(port).strip())
-                    ws_url = BitBrowserAPI.get_websocket_by_port(port_num)
-                    if ws_url:
-                        print(f"✓ 找到比特浏览器窗口: {browser_id}")
-                        print(f"  WebSocket: {ws_url}")
-                        return ws_url
-                except Exception:
+                    ports[browser_id] = int(str(port).strip())
+                except ValueError:
                     continue
 
-            print("✗ 未能获取 WebSocket 地址")
+            if ports:
+                executor = ThreadPoolExecutor(max_workers=min(16, len(ports)))
+                try:
+                    futures = {executor.submit(BitBrowserAPI.get_websocket_by_port, port): browser_id
+                               for browser_id, port in ports.items()}
+                    for future in as_completed(futures):
+                        ws_url = future.result()
+                        if ws_url:
+                            log.info("✓ 找到比特浏览器窗口: %s\n  WebSocket: %s", futures[future], ws_url)
+                            return ws_url
+                finally:
+                    # 命中后不再等待其余探测
+                    executor.shutdown(wait=False, cancel_futures=True)
+
+            log.warning("✗ 未能获取 WebSocket 地址")
             return None
 
         except URLError as e:
-            print("✗ 无法连接到比特浏览器本地服务")
-            print(f"  错误: {e}")
-            print("提示: 请确保比特浏览器客户端正在运行")
+            log.error("✗ 无法连接到比特浏览器本地服务\n  错误: %s\n提示: 请确保比特浏览器客户端正在运行", e)
             return None
         except Exception as e:
-            print(f"✗ 查找失败: {e}")
+            log.error("✗ 查找失败: %s", e)
             return None
 
     @staticmethod
@@ -346,8 +896,7 @@ class BitBrowserAPI:
         """
         url = f"http://127.0.0.1:{port}/json/version"
         try:
-            response = urlopen(url, timeout=timeout)
-            data = json.loads(response.read().decode("utf-8"))
+            data = _loads(_http.request("GET", url, timeout=timeout))
             ws = data.get("webSocketDebuggerUrl")
             if isinstance(ws, str) and ws.startswith("ws://"):
                 return ws
@@ -356,6 +905,42 @@ class BitBrowserAPI:
         return None
 
 
+class BitBrowserAPIAsync:
+    """比特浏览器API的 asyncio 版本
+
+    接口与 BitBrowserAPI 相同，在线程池中执行阻塞调用（共用同一个 keep-alive 连接池），
+    便于在一个事件循环里并发控制多个窗口。CDP 命令可用
+    await cdp.asend(...) 在协程中等待。
+
+    示例:
+        >>> results = await asyncio.gather(*(BitBrowserAPIAsync.open_window(i) for i in ids))
+    """
+
+    @staticmethod
+    async def create_window(name, platform=None, **kwargs):
+        """创建比特浏览器窗口，参数同 BitBrowserAPI.create_window"""
+        return await asyncio.to_thread(BitBrowserAPI.create_window, name, platform, **kwargs)
+
+    @staticmethod
+    async def open_window(browser_id):
+        """打开比特浏览器窗口，参数同 BitBrowserAPI.open_window"""
+        return await asyncio.to_thread(BitBrowserAPI.open_window, browser_id)
+
+    @staticmethod
+    async def close_window(browser_id):
+        """关闭比特浏览器窗口，参数同 BitBrowserAPI.close_window"""
+        return await asyncio.to_thread(BitBrowserAPI.close_window, browser_id)
+
+    @staticmethod
+    async def find_websocket():
+        """自动查找比特浏览器的WebSocket地址"""
+        return await asyncio.to_thread(BitBrowserAPI.find_websocket)
+
+
+# human_delay 专用的随机数生成器，不与调用方共享全局 random 的状态
+_rng = random.Random()
+
+
 def human_delay(base_seconds, jitter_percent=0.3):
     """模拟人类操作的延迟，添加随机抖动
     
@@ -373,9 +958,9 @@ def human_delay(base_seconds, jitter_percent=0.3):
         >>> actual_delay = human_delay(1.0, jitter_percent=0.5)
     """
     jitter = base_seconds * jitter_percent
-    delay = base_seconds + random.uniform(-jitter, jitter)
+    delay = base_seconds + (2 * _rng.random() - 1) * jitter
     # 确保延迟不小于0.1秒
-    delay = max(0.1, delay)
+    delay = 0.1 if delay < 0.1 else delay
     time.sleep(delay)
     return delay
 
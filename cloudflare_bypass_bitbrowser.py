@@ -6,6 +6,7 @@
 
 依赖:
     pip install websocket-client psutil
+    pip install orjson  # 可选，加速JSON序列化/解析
 
 使用方法:
     1. 先打开比特浏览器窗口
@@ -19,39 +20,104 @@
 
 import json
 import time
+import socket
 import websocket
 import sys
 from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
 
+# 可选依赖：orjson 直接输出/解析bytes，速度更快；未安装时使用标准库json
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode("utf-8")
+    _loads = json.loads
+
+
+# 验证框选择器（按优先级排列）
+_CF_SELECTORS = [
+    'div[id*="ulp-"]',           # Auth0 验证框
+    'div[class*="ulp-"]',
+    'div[id*="captcha"]',        # 通用验证码
+    'div[class*="captcha"]',
+    'iframe[src*="challenges.cloudflare.com"]',  # Cloudflare iframe
+    'div[id*="cf-"]',            # Cloudflare 元素
+    'div[class*="cf-"]',
+]
+
+# 返回第一个按优先级匹配到的元素的中心坐标和大小（未找到返回null）
+_FIND_CF_ELEMENT_JS = f"""
+(() => {{
+    for (const selector of {json.dumps(_CF_SELECTORS)}) {{
+        const element = document.querySelector(selector);
+        if (element) {{
+            const r = element.getBoundingClientRect();
+            return {{selector, x: r.left + r.width / 2, y: r.top + r.height / 2,
+                     width: r.width, height: r.height}};
+        }}
+    }}
+    return null;
+}})()
+"""
+
 
 class CDPClient:
     """简易 CDP 客户端"""
     def __init__(self, ws_url: str, timeout: float = 10.0):
-        self.ws = websocket.create_connection(ws_url, timeout=timeout, suppress_origin=True)
+        # 命令帧很小，显式关闭Nagle，避免与浏览器的延迟ACK叠加
+        self.ws = websocket.create_connection(ws_url, timeout=timeout, suppress_origin=True,
+                                             sockopt=((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),))
         self.ws.settimeout(timeout)
         self._id = 0
 
     def send(self, method: str, params: dict = None, session_id: str = None):
-        """发送 CDP 命令"""
+        """发送 CDP 命令，超时返回None，连接断开时抛出异常"""
         self._id += 1
         msg = {"id": self._id, "method": method, "params": params or {}}
         if session_id:
             msg["sessionId"] = session_id
         
-        self.ws.send(json.dumps(msg))
+        # CDP只接受文本帧；bytes 按文本帧发送
+        self.ws.send(_dumps(msg), websocket.ABNF.OPCODE_TEXT)
         
         # 等待响应
-        deadline = time.time() + 10.0
-        while time.time() < deadline:
+        # 单调时钟不受系统校时影响；recv 超时跟随剩余时间，不会越过截止时间
+        deadline = time.monotonic() + 10.0
+        # 不含本次ID的帧（大量事件推送）直接跳过，不做JSON解析；
+        # 浏览器输出紧凑JSON，也兼容冒号后带空格的写法；
+        # 子串命中后仍以解析出的 id 为准（可能是 "id":12 之类的前缀或嵌套字段）
+        needle = f'"id":{self._id}'
+        spaced = f'"id": {self._id}'
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self.ws.settimeout(remaining)
+            # 超时返回None；连接断开等错误直接抛出，不在已失效的连接上继续等待
             try:
                 raw = self.ws.recv()
-                resp = json.loads(raw)
+                if needle not in raw and spaced not in raw:
+                    continue
+                resp = _loads(raw)
                 if resp.get("id") == self._id:
                     return resp
-            except Exception:
+            except websocket.WebSocketTimeoutException:
+                # 到达截止时间仍未收到响应
                 return None
-        return None
+            except ValueError:
+                # 无法解析的帧直接跳过
+                continue
+
+    def send_nowait(self, method: str, params: dict = None, session_id: str = None):
+        """发送 CDP 命令但不等待响应（响应会在之后的 send 中按ID跳过）"""
+        self._id += 1
+        msg = {"id": self._id, "method": method, "params": params or {}}
+        if session_id:
+            msg["sessionId"] = session_id
+        self.ws.send(_dumps(msg), websocket.ABNF.OPCODE_TEXT)
 
     def close(self):
         """关闭连接"""
@@ -73,12 +139,12 @@ def find_bitbrowser_ws():
     try:
         # 1. 调用 /browser/ports API 获取所有已打开窗口的端口
         url = f"{BIT_BASE_URL}/browser/ports"
-        data = json.dumps({}).encode("utf-8")
+        data = _dumps({})
         headers = {"Content-Type": "application/json"}
 
         req = Request(url, data=data, headers=headers, method="POST")
         response = urlopen(req, timeout=5)
-        result = json.loads(response.read().decode("utf-8"))
+        result = _loads(response.read())
 
         if result.get("success") != True:
             print("✗ 比特浏览器 API 调用失败")
@@ -120,7 +186,7 @@ def fetch_ws_via_port(port: int, timeout: float = 3.0):
     url = f"http://127.0.0.1:{port}/json/version"
     try:
         response = urlopen(url, timeout=timeout)
-        data = json.loads(response.read().decode("utf-8"))
+        data = _loads(response.read())
         ws = data.get("webSocketDebuggerUrl")
         if isinstance(ws, str) and ws.startswith("ws://"):
             return ws
@@ -130,60 +196,24 @@ def fetch_ws_via_port(port: int, timeout: float = 3.0):
 
 
 def find_cloudflare_element(cdp: CDPClient, session_id: str):
-    """查找 Cloudflare 验证框元素"""
+    """查找 Cloudflare 验证框元素，返回其位置和大小"""
     print("\n🔍 查找 Cloudflare 验证框...")
-    
-    # 1. 获取文档根节点
-    result = cdp.send("DOM.getDocument", {"depth": -1}, session_id=session_id)
-    if not result or "result" not in result:
-        print("  ✗ 无法获取 DOM 文档")
-        return None
-    
-    root_node_id = result["result"]["root"]["nodeId"]
-    print(f"  ✓ 获取根节点: {root_node_id}")
-    
-    # 2. 查找验证框元素（支持多种选择器）
-    selectors = [
-        'div[id*="ulp-"]',           # Auth0 验证框
-        'div[class*="ulp-"]',
-        'div[id*="captcha"]',        # 通用验证码
-        'div[class*="captcha"]',
-        'iframe[src*="challenges.cloudflare.com"]',  # Cloudflare iframe
-        'div[id*="cf-"]',            # Cloudflare 元素
-        'div[class*="cf-"]',
-    ]
-    
-    for selector in selectors:
-        print(f"  🔍 尝试选择器: {selector}")
-        result = cdp.send("DOM.querySelectorAll", {
-            "nodeId": root_node_id,
-            "selector": selector
-        }, session_id=session_id)
-        
-        if result and "result" in result and result["result"].get("nodeIds"):
-            node_ids = result["result"]["nodeIds"]
-            print(f"    ✓ 找到 {len(node_ids)} 个元素")
-            return node_ids[0]  # 返回第一个匹配的元素
-    
-    print("  ✗ 未找到验证框元素")
-    return None
 
-
-def get_element_box(cdp: CDPClient, node_id: int, session_id: str):
-    """获取元素的位置和大小"""
-    result = cdp.send("DOM.getBoxModel", {"nodeId": node_id}, session_id=session_id)
-    if not result or "result" not in result:
+    # 页面内按优先级依次尝试选择器，并直接算出元素中心坐标，一次往返完成
+    result = cdp.send("Runtime.evaluate", {
+        "expression": _FIND_CF_ELEMENT_JS,
+        "returnByValue": True
+    }, session_id=session_id)
+    try:
+        box = result["result"]["result"]["value"]
+    except (TypeError, KeyError):
+        box = None
+    if not box:
+        print("  ✗ 未找到验证框元素")
         return None
-    
-    box_model = result["result"]["model"]
-    # content 是一个包含 8 个数字的数组: [x1, y1, x2, y2, x3, y3, x4, y4]
-    content = box_model["content"]
-    x = (content[0] + content[4]) / 2
-    y = (content[1] + content[5]) / 2
-    width = content[4] - content[0]
-    height = content[5] - content[1]
-    
-    return {"x": x, "y": y, "width": width, "height": height}
+
+    print("  ✓ 找到验证框元素")
+    return box
 
 
 def click_element_cdp(cdp: CDPClient, x: float, y: float, session_id: str):
@@ -191,15 +221,15 @@ def click_element_cdp(cdp: CDPClient, x: float, y: float, session_id: str):
     print(f"\n🖱️  发送 CDP 鼠标点击事件...")
     print(f"  📍 坐标: ({x:.1f}, {y:.1f})")
     
-    # 1. 鼠标移动到目标位置
-    cdp.send("Input.dispatchMouseEvent", {
+    # 1. 鼠标移动到目标位置（不等待响应）
+    cdp.send_nowait("Input.dispatchMouseEvent", {
         "type": "mouseMoved",
         "x": x,
         "y": y
     }, session_id=session_id)
     
-    # 2. 鼠标按下
-    cdp.send("Input.dispatchMouseEvent", {
+    # 2. 鼠标按下（不等待响应）
+    cdp.send_nowait("Input.dispatchMouseEvent", {
         "type": "mousePressed",
         "x": x,
         "y": y,
@@ -207,7 +237,7 @@ def click_element_cdp(cdp: CDPClient, x: float, y: float, session_id: str):
         "clickCount": 1
     }, session_id=session_id)
     
-    # 3. 鼠标释放
+    # 3. 鼠标释放，等待最后一个事件的响应
     cdp.send("Input.dispatchMouseEvent", {
         "type": "mouseReleased",
         "x": x,
@@ -222,7 +252,7 @@ def click_element_cdp(cdp: CDPClient, x: float, y: float, session_id: str):
 def check_captcha_token(cdp: CDPClient, session_id: str):
     """检查验证是否完成（查找 token）"""
     # 查找包含 captcha token 的 input 元素
-    result = cdp.send("DOM.getDocument", {"depth": -1}, session_id=session_id)
+    result = cdp.send("DOM.getDocument", {"depth": 0}, session_id=session_id)
     if not result or "result" not in result:
         return None
     
@@ -336,9 +366,9 @@ def main(ws_url: str = None):
         
         # 6. 查找验证框元素
         print("\n步骤 6: 查找验证框元素...")
-        node_id = find_cloudflare_element(cdp, session_id)
+        box = find_cloudflare_element(cdp, session_id)
         
-        if not node_id:
+        if not box:
             print("\n❌ 失败: 未找到验证框元素")
             print("\n可能的原因:")
             print("  1. 页面上没有 Cloudflare 验证框")
@@ -346,13 +376,11 @@ def main(ws_url: str = None):
             print("  3. 验证框使用了不同的选择器")
             return
         
-        print(f"✓ 找到验证框元素: NodeID={node_id}")
+        print(f"✓ 找到验证框元素: {box['selector']}")
         
-        # 7. 获取元素位置
+        # 7. 元素位置（与查找在同一次evaluate中算出）
         print("\n步骤 7: 获取元素位置...")
-        box = get_element_box(cdp, node_id, session_id)
-        
-        if not box:
+        if not box["width"] or not box["height"]:
             print("✗ 无法获取元素位置")
             return
         
@@ -380,6 +408,9 @@ def main(ws_url: str = None):
             print("  2. 需要手动完成验证")
             print("  3. 页面结构与预期不同")
     
+    except (websocket.WebSocketException, OSError) as e:
+        print(f"\n❌ 与浏览器的连接中断: {e}")
+
     finally:
         cdp.close()
         print("\n✓ 连接已关闭")
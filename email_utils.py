@@ -19,6 +19,25 @@ import json
 import os
 import random
 import string
+from datetime import datetime
+
+
+# save_email_to_file 写入的文件内容模板
+_EMAIL_FILE_TEMPLATE = """GPTMail 临时邮箱地址
+===================
+
+生成时间: {time}
+网站地址: https://mail.chatgpt.org.uk/
+
+邮箱地址: {email}
+
+访问链接: {url}
+
+说明:
+- 此邮箱为临时邮箱，1天后自动删除
+- 收件箱会自动刷新（30秒）
+- 可以通过访问链接直接查看该邮箱的收件箱
+"""
 
 
 class EmailUtils:
@@ -327,29 +346,17 @@ class EmailUtils:
         Returns:
             str: 保存的文件名，失败返回None
         """
-        from datetime import datetime
-
         print(f"\n💾 正在保存邮箱地址...")
 
-        access_url = f"https://mail.chatgpt.org.uk/{email}"
-
-        content = f"""GPTMail 临时邮箱地址
-===================
-
-生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-网站地址: https://mail.chatgpt.org.uk/
-
-邮箱地址: {email}
-
-访问链接: {access_url}
-
-说明:
-- 此邮箱为临时邮箱，1天后自动删除
-- 收件箱会自动刷新（30秒）
-- 可以通过访问链接直接查看该邮箱的收件箱
-"""
+        # 文件名和内容使用同一个时间
+        now = datetime.now()
+        content = _EMAIL_FILE_TEMPLATE.format(
+            time=now.strftime('%Y-%m-%d %H:%M:%S'),
+            email=email,
+            url=f"https://mail.chatgpt.org.uk/{email}",
+        )
 
-        filename = f"临时邮箱_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+        filename = f"临时邮箱_{now.strftime('%Y%m%d_%H%M%S')}.txt"
 
         try:
             with open(filename, 'w', encoding='utf-8') as f:
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+augment_register 测试
+
+运行方法：
+    python -m unittest discover -s tests
+"""
+
+import http.client
+import http.server
+import json
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import augment_register
+
+
+class _MailHandler(http.server.BaseHTTPRequestHandler):
+    """模拟邮箱API：第1次返回空收件箱（带ETag），第2次304，第3次返回验证码邮件；
+    每次响应后都静默关闭连接（不发送 Connection: close），模拟服务端回收空闲连接"""
+
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append(self.headers.get("If-None-Match"))
+        count = len(type(self).requests)
+        if count == 2:
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            if count == 1:
+                data = {"emails": []}
+            else:
+                data = {"emails": [{"from": "support@augmentcode.com",
+                                    "subject": "Verify",
+                                    "content": "Your verification code is: 123456"}]}
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+class VerificationCodePollingTest(unittest.TestCase):
+
+    def setUp(self):
+        _MailHandler.requests = []
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _MailHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_code_returned_when_server_closes_connection_between_polls(self):
+        port = self.server.server_address[1]
+        sleeps = []
+        with mock.patch.object(augment_register, "_mail_connection",
+                               lambda: http.client.HTTPConnection("127.0.0.1", port, timeout=5)), \
+                mock.patch.object(augment_register, "_internal_sleep", sleeps.append):
+            code = augment_register.get_verification_code_from_email("a@example.com")
+
+        self.assertEqual(code, "123456")
+        # 每次空闲关闭都立即重连重试，不消耗尝试次数：3次轮询只等待2次
+        self.assertEqual(len(_MailHandler.requests), 3)
+        self.assertEqual(len(sleeps), 2)
+        # 重连后仍带上之前保存的ETag
+        self.assertEqual(_MailHandler.requests[1:], ['"v1"', '"v1"'])
+
+
+class _ScriptedCDP:
+    """按方法名返回预设响应的CDP客户端，记录发送的命令"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.methods = []
+
+    def send(self, method, params=None, session_id=None):
+        self.methods.append(method)
+        replies = self.responses[method]
+        return replies.pop(0) if len(replies) > 1 else replies[0]
+
+
+class RunScriptTest(unittest.TestCase):
+
+    def setUp(self):
+        augment_register._SCRIPT_IDS.clear()
+        self.addCleanup(augment_register._SCRIPT_IDS.clear)
+
+    def test_no_response_does_not_rerun_script(self):
+        cdp = _ScriptedCDP({
+            "Runtime.compileScript": [{"id": 1, "result": {"scriptId": "1"}}],
+            "Runtime.runScript": [None],
+        })
+        self.assertIsNone(augment_register._run_script(cdp, "S", "click", "el.click()"))
+        self.assertEqual(cdp.methods, ["Runtime.compileScript", "Runtime.runScript"])
+
+    def test_stale_script_is_recompiled(self):
+        ok = {"id": 4, "result": {"result": {"type": "boolean", "value": True}}}
+        cdp = _ScriptedCDP({
+            "Runtime.compileScript": [{"id": 1, "result": {"scriptId": "1"}}],
+            "Runtime.runScript": [{"id": 2, "error": {"code": -32000, "message": "No script with given id"}},
+                                  ok],
+        })
+        self.assertIs(augment_register._run_script(cdp, "S", "click", "el.click()"), ok)
+        self.assertEqual(cdp.methods, ["Runtime.compileScript", "Runtime.runScript",
+                                       "Runtime.compileScript", "Runtime.runScript"])
+
+
+class _EventCDP:
+    """点击后按顺序推送预设事件的CDP客户端"""
+
+    def __init__(self, events):
+        self.events = events
+
+    def subscribe(self, *methods):
+        self.methods = methods
+        return list(self.events)
+
+    def unsubscribe(self, q):
+        pass
+
+    def wait_event(self, q, predicate=None, timeout=10.0):
+        for msg in q:
+            if msg["method"] in self.methods and predicate(msg):
+                return msg
+        return None
+
+
+class PaymentLinkTest(unittest.TestCase):
+
+    def setUp(self):
+        for name, value in (("_internal_sleep", lambda *a: None),
+                            ("locate_button_by_text", lambda *a: (10, 20)),
+                            ("dispatch_click", lambda *a, **k: True)):
+            patcher = mock.patch.object(augment_register, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _session(self, events):
+        session = mock.Mock()
+        session.cdp = _EventCDP(events)
+        session.attach_onboard.return_value = "S"
+        session.find_target.return_value = None
+        return session
+
+    def test_payment_page_opened_in_new_tab(self):
+        url = "https://checkout.stripe.com/c/pay/cs_test"
+        session = self._session([
+            {"method": "Target.targetInfoChanged",
+             "params": {"targetInfo": {"type": "page", "url": "https://app.augmentcode.com/onboard"}}},
+            {"method": "Target.targetCreated",
+             "params": {"targetInfo": {"type": "page", "url": url}}},
+        ])
+        self.assertEqual(augment_register.get_payment_method_link(session), url)
+
+    def test_main_frame_leaving_onboard(self):
+        url = "https://app.augmentcode.com/account/subscription"
+        session = self._session([
+            {"method": "Page.frameNavigated", "sessionId": "S",
+             "params": {"frame": {"id": "child", "parentId": "F", "url": "https://js.stripe.com/v3"}}},
+            {"method": "Page.frameNavigated", "sessionId": "S", "params": {"frame": {"id": "F", "url": url}}},
+        ])
+        self.assertEqual(augment_register.get_payment_method_link(session), url)
+
+
+if __name__ == "__main__":
+    unittest.main()
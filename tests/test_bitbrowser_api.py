@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bitbrowser_api 测试
+
+运行方法：
+    python -m unittest discover -s tests
+"""
+
+import base64
+import hashlib
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+import websocket
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitbrowser_api import CDPClient
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class _FakeCDPServer:
+    """最小的CDP WebSocket服务端：对每条命令回复空结果，只服务一个连接
+
+    收到 Test.ping 命令时先发送一个 ping 帧，并统计收到的 pong 帧数量。
+    """
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(1)
+        self.url = f"ws://127.0.0.1:{self.sock.getsockname()[1]}/devtools/browser/test"
+        self.methods = []
+        self.pongs = 0
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        conn, _ = self.sock.accept()
+        with conn:
+            rfile = conn.makefile("rb")
+            key = None
+            for line in iter(rfile.readline, b"\r\n"):
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "sec-websocket-key":
+                    key = value.strip()
+            accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+            conn.sendall(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                          f"Connection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+            while True:
+                header = rfile.read(2)
+                if len(header) < 2:
+                    return
+                opcode = header[0] & 0x0F
+                length = header[1] & 0x7F
+                if length == 126:
+                    length = struct.unpack(">H", rfile.read(2))[0]
+                elif length == 127:
+                    length = struct.unpack(">Q", rfile.read(8))[0]
+                mask = rfile.read(4)
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(rfile.read(length)))
+                if opcode == 0x8:
+                    return
+                if opcode == 0xA:
+                    self.pongs += 1
+                    continue
+                if opcode != 0x1:
+                    continue
+                msg = json.loads(payload)
+                self.methods.append(msg["method"])
+                if msg["method"] == "Test.ping":
+                    conn.sendall(bytes([0x89, 0]))
+                reply = json.dumps({"id": msg["id"], "result": {}}).encode()
+                conn.sendall(bytes([0x81, len(reply)]) + reply if len(reply) < 126
+                             else bytes([0x81, 126]) + struct.pack(">H", len(reply)) + reply)
+
+    def close(self):
+        self.sock.close()
+
+
+class SendNowaitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = _FakeCDPServer()
+        self.addCleanup(self.server.close)
+        self.cdp = CDPClient(self.server.url, timeout=2)
+        self.addCleanup(self.cdp.close)
+
+    def test_send_nowait_returns_message_id(self):
+        self.assertIsInstance(self.cdp.send_nowait("Page.enable"), int)
+
+    def test_send_nowait_after_close_returns_none(self):
+        self.cdp.close()
+        self.assertIsNone(self.cdp.send_nowait("Input.dispatchMouseEvent", {"type": "mouseMoved"}))
+        # 与 send() 行为一致
+        self.assertIsNone(self.cdp.send("Page.enable"))
+
+    def test_send_nowait_write_error_returns_none(self):
+        with mock.patch.object(self.cdp.ws, "send",
+                               side_effect=websocket.WebSocketConnectionClosedException("closed")):
+            self.assertIsNone(self.cdp.send_nowait("Runtime.removeBinding", {"name": "x"}))
+
+
+class ControlFrameLockTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = _FakeCDPServer()
+        self.addCleanup(self.server.close)
+        self.cdp = CDPClient(self.server.url, timeout=2)
+        self.addCleanup(self.cdp.close)
+
+    def test_reader_pong_waits_for_send_lock(self):
+        with self.cdp._send_lock:
+            self.cdp.send_nowait("Test.ping")
+            time.sleep(0.3)
+            # 持锁期间读线程不能写出 pong
+            self.assertEqual(self.server.pongs, 0)
+        deadline = time.monotonic() + 2
+        while not self.server.pongs and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.server.pongs, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()